@@ -0,0 +1,85 @@
+"""
+A local Google Sheets stand-in that enforces a request quota.
+
+Every worksheet call counts against one sliding-window limit shared by
+the whole "project", takes `latency` seconds, and fails with a 429
+QuotaError once the limit is used up, just as the real API answers
+with gspread's APIError. A Quota can be served from a multiprocessing
+manager so that several processes share it. Used by sheets_quota.py
+to compare request scheduling strategies without credentials or
+network access.
+"""
+import collections
+import threading
+import time
+
+from harness import LocalSheets, LocalWorksheet
+
+
+class QuotaResponse:
+    status_code = 429
+
+
+class QuotaError(Exception):
+    """What the fake raises when over quota; looks like a gspread 429."""
+
+    response = QuotaResponse()
+
+
+class Quota:
+    """At most `limit` requests in any `window` seconds."""
+
+    def __init__(self, limit=60, window=60.0, latency=0.05):
+        self.limit = limit
+        self.window = window
+        self.latency = latency
+        self.calls = collections.Counter()
+        self.rejected = 0
+        self._recent = collections.deque()
+        self._lock = threading.Lock()
+
+    def spend(self, method):
+        with self._lock:
+            now = time.monotonic()
+            while self._recent and now - self._recent[0] >= self.window:
+                self._recent.popleft()
+            if len(self._recent) >= self.limit:
+                self.rejected += 1
+                raise QuotaError(f"429: quota exceeded on {method}")
+            self._recent.append(now)
+            self.calls[method] += 1
+        time.sleep(self.latency)
+
+    def summary(self):
+        """(calls per method, requests rejected), e.g. through a proxy."""
+        with self._lock:
+            return dict(self.calls), self.rejected
+
+
+class QuotaWorksheet:
+    """A LocalWorksheet whose calls are each charged to a Quota."""
+
+    def __init__(self, quota, rows=()):
+        self.quota = quota
+        self.local = LocalWorksheet(rows)
+        self._lock = threading.Lock()
+
+    def __getattr__(self, method):
+        local_method = getattr(self.local, method)
+
+        def call(*args, **kwargs):
+            self.quota.spend(method)
+            with self._lock:
+                return local_method(*args, **kwargs)
+
+        return call
+
+
+def quota_sheets(quota, easy_rows=(), hard_rows=()):
+    """A connection stand-in whose worksheets share one Quota."""
+    return LocalSheets(
+        {
+            "Easy Scores": QuotaWorksheet(quota, easy_rows),
+            "Hard Scores": QuotaWorksheet(quota, hard_rows),
+        }
+    )
@@ -0,0 +1,191 @@
+"""
+Helpers for driving the quiz headlessly in benchmarks.
+"""
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# Never touch real Google Sheets from a benchmark by accident
+os.environ.setdefault("QUIZ_SCORE_BACKEND", "sqlite")
+os.environ.setdefault("QUIZ_SQLITE_PATH", ":memory:")
+
+from sheets import RequestScheduler  # noqa: E402
+from storage import SheetsScoreStore  # noqa: E402
+from terminal import Terminal  # noqa: E402
+
+# Title, name, Easy mode, ten answers, two summary pages, all-time
+# leaderboard, exit
+EASY_GAME = ["", "Bench Player", "1"] + ["1"] * 10 + ["", "", "2", "1", "3"]
+
+
+class ScriptedTerminal(Terminal):
+    """
+    A Terminal that answers from a script and counts its output.
+
+    `busy` collects the time spent between handing back a line and the
+    next read, i.e. how long the quiz took to react to each input.
+    """
+
+    def __init__(self, lines):
+        super().__init__(
+            force_terminal=True, color_system="standard", width=80, height=24
+        )
+        self.lines = list(lines)
+        self.bytes_out = 0
+        self.writes = 0
+        self.busy = []
+        self._answered_at = None
+
+    def isatty(self):
+        return True
+
+    def _emit(self, text):
+        self.bytes_out += len(text.encode("utf-8"))
+        self.writes += 1
+
+    def _read_line(self, deadline):
+        now = time.perf_counter()
+        if self._answered_at is not None:
+            self.busy.append(now - self._answered_at)
+        if not self.lines:
+            raise EOFError
+        self._answered_at = time.perf_counter()
+        return self.lines.pop(0)
+
+    def discard_input(self):
+        pass
+
+
+class GridResponse:
+    status_code = 400
+
+
+class GridError(Exception):
+    """A range starting past the last row; looks like a gspread 400."""
+
+    response = GridResponse()
+
+
+class LocalWorksheet:
+    """
+    In-memory stand-in for the gspread Worksheet calls we make.
+
+    The grid is exactly as tall as the rows held, as after appends to a
+    real worksheet, and ranges starting below it fail the same way.
+    """
+
+    def __init__(self, rows=()):
+        self.rows = [["Name", "Score", "Date"]] + [list(r) for r in rows]
+
+    def _check(self, range_name):
+        start = int(range_name.split(":")[0][1:])
+        if start > len(self.rows):
+            raise GridError(
+                f"APIError: [400]: Range ({range_name}) exceeds grid "
+                f"limits. Max rows: {len(self.rows)}"
+            )
+        return start
+
+    def get_all_values(self):
+        return [[str(v) for v in row] for row in self.rows]
+
+    def get(self, range_name):
+        # Only the "A<start>:C" and "A<start>:C<end>" shapes we use
+        start = self._check(range_name)
+        last = range_name.split(":")[1]
+        end = int(last[1:]) if last[1:] else len(self.rows)
+        width = "ABC".index(last[0]) + 1
+        return [
+            [str(v) for v in row[:width]] for row in self.rows[start - 1:end]
+        ]
+
+    def update(self, values, range_name):
+        start = int(range_name.split(":")[0][1:])
+        del self.rows[start - 1:start - 1 + len(values)]
+        self.rows[start - 1:start - 1] = [list(row) for row in values]
+
+    def batch_get(self, ranges):
+        return [self.get(range_name) for range_name in ranges]
+
+    def batch_update(self, data):
+        for update in data:
+            self.update(update["values"], update["range"])
+
+    def batch_clear(self, ranges):
+        for range_name in ranges:
+            del self.rows[self._check(range_name) - 1:]
+
+    def resize(self, rows):
+        del self.rows[rows:]
+
+    def append_row(self, row):
+        self.rows.append(list(row))
+
+    def append_rows(self, rows):
+        self.rows.extend(list(row) for row in rows)
+
+
+class LocalSheets:
+    """Stand-in for SheetsConnection serving LocalWorksheets."""
+
+    def __init__(self, worksheets):
+        self.worksheets = worksheets
+
+    def start(self):
+        return self
+
+    def worksheet(self, name):
+        return self.worksheets[name]
+
+    def add_worksheet(self, name, header):
+        if name not in self.worksheets:
+            self.worksheets[name] = LocalWorksheet()
+            self.worksheets[name].rows = [list(header)]
+        return self.worksheets[name]
+
+
+def local_sheets_store(easy_rows=(), hard_rows=()):
+    """A SheetsScoreStore backed by in-memory worksheets, with no quota."""
+    return SheetsScoreStore(
+        LocalSheets(
+            {
+                "Easy Scores": LocalWorksheet(easy_rows),
+                "Hard Scores": LocalWorksheet(hard_rows),
+            }
+        ),
+        scheduler=RequestScheduler(rate=0),
+    )
+
+
+def time_to_title():
+    """Seconds from spawning run.py until the title prompt is printed."""
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "run.py"],
+        cwd=ROOT,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+    )
+    seen = b""
+    while b"Press Enter" not in seen:
+        chunk = os.read(proc.stdout.fileno(), 65536)
+        if not chunk:
+            break
+        seen += chunk
+    elapsed = time.perf_counter() - started
+    proc.kill()
+    proc.wait()
+    return elapsed
+
+
+def percentile(values, pct):
+    """Return the pct-th percentile of a list of numbers."""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    k = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[k]
@@ -0,0 +1,89 @@
+"""
+Startup regression check: import cost and time to the title screen.
+
+    python3 benchmarks/import_budget.py
+    python3 benchmarks/import_budget.py --import-budget 50 --title-budget 120
+
+`python -X importtime -c "import run"` must stay within the import
+budget and must not load any of the modules that are deferred until
+first use. The title screen must appear within its budget (median of
+--repeat spawns). Exits non-zero, listing the slowest imports, when
+anything is over.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+from harness import ROOT, time_to_title
+
+# Loaded on first use, never while the title screen is being drawn
+DEFERRED = ("rich", "pyfiglet", "gspread", "google", "sqlite3")
+
+
+def import_times():
+    """Return {module: (self_us, cumulative_us)} for `import run`."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import run"],
+        cwd=ROOT,
+        env=dict(os.environ, QUIZ_SCORE_BACKEND="sheets"),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative, name = line[len("import time:"):].split("|")
+        if not self_us.strip().isdigit():
+            continue  # Header line
+        times[name.strip()] = (int(self_us), int(cumulative))
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--import-budget", type=float, default=50, help="ms for import run"
+    )
+    parser.add_argument(
+        "--title-budget", type=float, default=120, help="ms to title screen"
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    times = import_times()
+    import_ms = times["run"][1] / 1000
+    loaded = sorted(
+        name for name in times if name.split(".")[0] in DEFERRED
+    )
+    title_ms = statistics.median(
+        time_to_title() for _ in range(args.repeat)
+    ) * 1000
+
+    print(f"import run:    {import_ms:6.1f} ms "
+          f"(budget {args.import_budget:g})")
+    print(f"title screen:  {title_ms:6.1f} ms "
+          f"(budget {args.title_budget:g})")
+    failures = []
+    if import_ms > args.import_budget:
+        failures.append("import run is over budget")
+    if title_ms > args.title_budget:
+        failures.append("time to title screen is over budget")
+    if loaded:
+        failures.append("deferred modules imported: " + ", ".join(loaded))
+    if failures:
+        print("\nSlowest imports (self time):")
+        slowest = sorted(times.items(), key=lambda item: -item[1][0])[:15]
+        for name, (self_us, cumulative) in slowest:
+            print(f"  {self_us / 1000:6.1f} ms  {name}")
+        for failure in failures:
+            print(f"FAIL: {failure}")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,302 @@
+"""
+Benchmark and load-test suite for the quiz engine.
+
+    python3 benchmarks/quiz_bench.py startup
+    python3 benchmarks/quiz_bench.py game --games 200
+    python3 benchmarks/quiz_bench.py leaderboard --rows 10000 100000 1000000
+    python3 benchmarks/quiz_bench.py headless --games 10000
+    python3 benchmarks/quiz_bench.py players --url ws://127.0.0.1:8000/ -n 50
+
+Everything except `players` runs headlessly: Quiz is driven through a
+ScriptedTerminal, and scores go to in-memory worksheets behind the real
+SheetsScoreStore code. `players` connects N concurrent websocket
+clients to a running launcher (node index.js) and plays full games,
+reporting websocket frames and bytes per game. Compare launcher
+settings such as QUIZ_COALESCE_MS=0 against the default, and pass
+--launcher-pid to include the node process's CPU time per player.
+`headless` pipes pipelined games through headless.py and reports
+answers per second.
+"""
+import argparse
+import asyncio
+import base64
+import json
+import os
+import random
+import statistics
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.parse import urlparse
+
+from harness import (
+    EASY_GAME,
+    ROOT,
+    ScriptedTerminal,
+    local_sheets_store,
+    percentile,
+    time_to_title,
+)
+
+os.environ.setdefault("QUIZ_SPOOL_DIR", tempfile.mkdtemp())
+
+
+def bench_startup(args):
+    """Import time and time until the title screen is on screen."""
+    imports, frames = [], []
+    for _ in range(args.repeat):
+        started = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-c", "import run"], cwd=ROOT, check=True
+        )
+        imports.append(time.perf_counter() - started)
+        frames.append(time_to_title())
+    import_ms = statistics.median(imports) * 1000
+    frame_ms = statistics.median(frames) * 1000
+    print(f"python -c 'import run': {import_ms:.0f} ms")
+    print(f"time to title screen:   {frame_ms:.0f} ms")
+
+
+def bench_game(args):
+    """Full headless games: per-question latency and output volume."""
+    import run
+
+    run.STORE = local_sheets_store()
+    run.LEADERBOARD.store = run.STORE
+    run.SCORE_QUEUE.store = run.STORE
+    run.STATS.store = run.STORE
+
+    busy, out_bytes, writes = [], [], []
+    started = time.perf_counter()
+    for _ in range(args.games):
+        terminal = ScriptedTerminal(EASY_GAME)
+        run.play(terminal)
+        busy.extend(terminal.busy)
+        out_bytes.append(terminal.bytes_out)
+        writes.append(terminal.writes)
+    elapsed = time.perf_counter() - started
+
+    print(f"games:                {args.games} in {elapsed:.2f} s")
+    print(f"per input p50 / p99:  {percentile(busy, 50) * 1000:.2f} / "
+          f"{percentile(busy, 99) * 1000:.2f} ms")
+    print(f"output per game:      {statistics.mean(out_bytes):.0f} bytes in "
+          f"{statistics.mean(writes):.0f} writes")
+
+
+def bench_leaderboard(args):
+    """Leaderboard latency against worksheets of increasing size."""
+    from leaderboard import LeaderboardCache
+
+    for count in args.rows:
+        rows = [
+            (f"Player {i}", random.randint(0, 10), "2025-01-01")
+            for i in range(count)
+        ]
+        store = local_sheets_store(easy_rows=rows)
+
+        started = time.perf_counter()
+        store.top_scores("Easy", 10)
+        full = time.perf_counter() - started
+
+        cache = LeaderboardCache(store, size=10, ttl=0)
+        started = time.perf_counter()
+        cache.top("Easy")
+        cold = time.perf_counter() - started
+
+        store.append_scores("Easy", rows[:100])
+        started = time.perf_counter()
+        cache.top("Easy")  # ttl=0: fetches just the 100 new rows
+        incremental = time.perf_counter() - started
+
+        cache.ttl = 3600
+        started = time.perf_counter()
+        cache.top("Easy")
+        warm = time.perf_counter() - started
+
+        print(f"{count:>9} rows: full sort {full * 1000:8.1f} ms | "
+              f"cache cold {cold * 1000:8.1f} ms | "
+              f"+100 rows {incremental * 1000:6.2f} ms | "
+              f"warm {warm * 1000:6.3f} ms")
+
+
+def bench_headless(args):
+    """Answers per second through the headless JSON-lines protocol."""
+    requests = []
+    for game in range(args.games):
+        session = f"bench-{game}"
+        requests.append(
+            {"op": "start", "name": "Bench Player", "difficulty": "Easy",
+             "session": session}
+        )
+        for _ in range(10):
+            requests.append({"op": "next", "session": session})
+            requests.append({"op": "answer", "session": session, "choice": 1})
+        requests.append({"op": "results", "session": session})
+    payload = "".join(json.dumps(r) + "\n" for r in requests).encode()
+
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "headless.py"],
+        cwd=ROOT,
+        input=payload,
+        capture_output=True,
+        check=True,
+    )
+    elapsed = time.perf_counter() - started
+    replies = result.stdout.splitlines()
+    failed = sum(1 for reply in replies if not json.loads(reply)["ok"])
+    answers = args.games * 10
+    print(f"games:            {args.games} in {elapsed:.2f} s "
+          f"(including process start)")
+    print(f"requests:         {len(replies)}, {failed} failed")
+    print(f"answers/second:   {answers / elapsed:,.0f}")
+
+
+async def ws_connect(url):
+    """Open a websocket with a bare-bones RFC 6455 handshake."""
+    parts = urlparse(url)
+    reader, writer = await asyncio.open_connection(
+        parts.hostname, parts.port or 80
+    )
+    key = base64.b64encode(os.urandom(16)).decode()
+    writer.write(
+        (
+            f"GET {parts.path or '/'} HTTP/1.1\r\n"
+            f"Host: {parts.netloc}\r\n"
+            "Upgrade: websocket\r\nConnection: Upgrade\r\n"
+            f"Sec-WebSocket-Key: {key}\r\n"
+            "Sec-WebSocket-Version: 13\r\n\r\n"
+        ).encode()
+    )
+    response = await reader.readuntil(b"\r\n\r\n")
+    if b" 101 " not in response.split(b"\r\n", 1)[0]:
+        raise ConnectionError(response.split(b"\r\n", 1)[0].decode())
+    return reader, writer
+
+
+def ws_frame(payload):
+    """A masked text frame, as clients must send."""
+    mask = os.urandom(4)
+    length = len(payload)
+    if length < 126:
+        header = struct.pack("!BB", 0x81, 0x80 | length)
+    elif length < 65536:
+        header = struct.pack("!BBH", 0x81, 0x80 | 126, length)
+    else:
+        header = struct.pack("!BBQ", 0x81, 0x80 | 127, length)
+    masked = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+    return header + mask + masked
+
+
+async def ws_read_frame(reader):
+    """Return (opcode, payload) for the next server frame."""
+    first, second = await reader.readexactly(2)
+    length = second & 0x7F
+    if length == 126:
+        (length,) = struct.unpack("!H", await reader.readexactly(2))
+    elif length == 127:
+        (length,) = struct.unpack("!Q", await reader.readexactly(8))
+    return first & 0x0F, await reader.readexactly(length)
+
+
+async def ws_player(url, think_time, stats):
+    started = time.perf_counter()
+    reader, writer = await ws_connect(url)
+    first_byte = None
+    frames = received = 0
+
+    async def receive():
+        nonlocal first_byte, frames, received
+        while True:
+            try:
+                opcode, payload = await ws_read_frame(reader)
+            except (asyncio.IncompleteReadError, ConnectionError):
+                return
+            if opcode == 0x8:  # Close
+                return
+            if first_byte is None:
+                first_byte = time.perf_counter() - started
+            frames += 1
+            received += len(payload)
+
+    receiving = asyncio.ensure_future(receive())
+    for line in EASY_GAME:
+        await asyncio.sleep(think_time)
+        writer.write(ws_frame(line.encode() + b"\r"))
+    await asyncio.wait_for(receiving, timeout=60)
+    writer.close()
+    stats.append((first_byte or 0.0, frames, received))
+
+
+def cpu_seconds(pid):
+    """User plus system CPU time used so far by a process (Linux)."""
+    with open(f"/proc/{pid}/stat") as stat:
+        fields = stat.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def bench_players(args):
+    """N concurrent players against the websocket launcher."""
+    stats = []
+    cpu_before = cpu_seconds(args.launcher_pid) if args.launcher_pid else 0
+
+    async def run_all():
+        await asyncio.gather(
+            *(ws_player(args.url, args.think_time, stats)
+              for _ in range(args.players))
+        )
+
+    started = time.perf_counter()
+    asyncio.run(run_all())
+    elapsed = time.perf_counter() - started
+    first = [s[0] for s in stats]
+    print(f"players:             {len(stats)}/{args.players} finished "
+          f"in {elapsed:.2f} s")
+    print(f"first byte p50/p99:  {percentile(first, 50) * 1000:.0f} / "
+          f"{percentile(first, 99) * 1000:.0f} ms")
+    print(f"frames per game:     {statistics.mean(s[1] for s in stats):.0f}")
+    print(f"bytes per game:      {statistics.mean(s[2] for s in stats):.0f}")
+    if args.launcher_pid and stats:
+        cpu = cpu_seconds(args.launcher_pid) - cpu_before
+        print(f"launcher CPU/player: {cpu / len(stats) * 1000:.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    startup = commands.add_parser("startup", help=bench_startup.__doc__)
+    startup.add_argument("--repeat", type=int, default=5)
+    startup.set_defaults(func=bench_startup)
+
+    game = commands.add_parser("game", help=bench_game.__doc__)
+    game.add_argument("--games", type=int, default=100)
+    game.set_defaults(func=bench_game)
+
+    board = commands.add_parser("leaderboard", help=bench_leaderboard.__doc__)
+    board.add_argument(
+        "--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000]
+    )
+    board.set_defaults(func=bench_leaderboard)
+
+    headless = commands.add_parser("headless", help=bench_headless.__doc__)
+    headless.add_argument("--games", type=int, default=2000)
+    headless.set_defaults(func=bench_headless)
+
+    players = commands.add_parser("players", help=bench_players.__doc__)
+    players.add_argument("--url", default="ws://127.0.0.1:8000/")
+    players.add_argument("-n", "--players", type=int, default=20)
+    players.add_argument("--think-time", type=float, default=0.5)
+    players.add_argument(
+        "--launcher-pid", type=int, help="node process to report CPU for"
+    )
+    players.set_defaults(func=bench_players)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Capacity benchmark for server.py.
+
+Starts the quiz server on a throwaway SQLite store and connects N
+players at once. Each plays a full Easy game with a short think time
+between answers. Reports wall time, server CPU time and peak memory.
+
+    python3 benchmarks/server_capacity.py --players 300
+"""
+import argparse
+import asyncio
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Title, name, difficulty, ten answers, two summary pages, leaderboard, exit
+SCRIPT = ["", "Bench Player", "1"] + ["1"] * 10 + ["", "", "2", "3"]
+
+
+async def player(port, think_time, received):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+
+    async def drain():
+        while True:
+            data = await reader.read(65536)
+            if not data:
+                return
+            received.append(len(data))
+
+    reading = asyncio.ensure_future(drain())
+    for line in SCRIPT:
+        await asyncio.sleep(think_time)
+        writer.write(line.encode() + b"\r")
+    await reading
+    writer.close()
+
+
+async def run_players(port, players, think_time):
+    received = []
+    started = time.perf_counter()
+    await asyncio.gather(
+        *(player(port, think_time, received) for _ in range(players))
+    )
+    return time.perf_counter() - started, sum(received)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--players", type=int, default=200)
+    parser.add_argument("--think-time", type=float, default=0.2)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    env = dict(
+        os.environ,
+        QUIZ_SCORE_BACKEND="sqlite",
+        QUIZ_SQLITE_PATH=os.path.join(tmp, "scores.db"),
+        QUIZ_SPOOL_DIR=os.path.join(tmp, "spool"),
+    )
+    server = subprocess.Popen(
+        [sys.executable, "server.py", "--port", str(args.port)],
+        cwd=ROOT,
+        env=env,
+    )
+    try:
+        time.sleep(1.5)  # Let the server import and bind
+        wall, total_bytes = asyncio.run(
+            run_players(args.port, args.players, args.think_time)
+        )
+    finally:
+        server.terminate()
+        server.wait()
+
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    cpu = usage.ru_utime + usage.ru_stime
+    print(f"players:            {args.players} concurrent")
+    print(f"wall time:          {wall:.2f} s")
+    print(f"server CPU:         {cpu:.2f} s "
+          f"({cpu / args.players * 1000:.1f} ms per game)")
+    print(f"bytes sent:         {total_bytes / args.players:.0f} per game")
+    print(f"server peak RSS:    {usage.ru_maxrss / 1024:.1f} MiB")
+    print(f"games per CPU-sec:  {args.players / cpu:.0f}")
+
+
+if __name__ == "__main__":
+    main()
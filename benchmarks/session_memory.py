@@ -0,0 +1,99 @@
+"""
+Memory used per active quiz session.
+
+Builds many finished games in memory and reports bytes per session
+measured with tracemalloc. It compares the game state alone (questions
+and answers) with the old list-of-dicts layout, and also reports a
+whole Quiz with its Terminal and rich Console.
+
+    python3 benchmarks/session_memory.py --sessions 2000
+"""
+import argparse
+import os
+import random
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QUIZ_SCORE_BACKEND", "sqlite")
+os.environ.setdefault("QUIZ_SQLITE_PATH", ":memory:")
+
+import run  # noqa: E402
+from questions import AnswerSheet, load_question_bank  # noqa: E402
+
+
+def legacy_game(bank):
+    """The per-session state run.py kept before AnswerSheet."""
+    questions = []
+    for qid in bank.sample(10):
+        question = bank.question(qid)
+        questions.append(
+            {
+                "question": question.text,
+                "options": list(question.options),
+                "answer": question.answer_text,
+            }
+        )
+    summary = []
+    for question in questions:
+        chosen = random.choice(question["options"])
+        summary.append(
+            {
+                "question": question["question"],
+                "your_answer": chosen,
+                "correct_answer": question["answer"],
+                "result": (
+                    "Correct" if chosen == question["answer"] else "Wrong"
+                ),
+            }
+        )
+    return questions, summary
+
+
+def compact_game(bank):
+    answers = AnswerSheet(bank.sample(10))
+    for qid in answers.question_ids:
+        question = bank.question(qid)
+        answers.record(question, random.randrange(len(question.options)))
+    return answers
+
+
+def full_session(bank):
+    quiz = run.Quiz(run.Terminal())
+    quiz.name, quiz.difficulty = "Bench Player", "Easy"
+    quiz.bank = bank
+    quiz.answers = compact_game(bank)
+    return quiz
+
+
+def measure(build, sessions):
+    """Return bytes allocated per session by `build`."""
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    kept = [build() for _ in range(sessions)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    diff = after.compare_to(before, "filename")
+    total = sum(stat.size_diff for stat in diff)
+    del kept
+    return total / sessions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=2000)
+    args = parser.parse_args()
+
+    bank = load_question_bank(run.QUESTIONS_FILE)
+    bank.question(0)  # Warm any lazy state before measuring
+
+    legacy = measure(lambda: legacy_game(bank), args.sessions)
+    compact = measure(lambda: compact_game(bank), args.sessions)
+    session = measure(lambda: full_session(bank), args.sessions)
+    print(f"game state, list of dicts:   {legacy:8.0f} bytes per session")
+    print(f"game state, AnswerSheet:     {compact:8.0f} bytes per session")
+    print(f"whole Quiz + Terminal:       {session:8.0f} bytes per session")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Google Sheets quota benchmark, run against fake_sheets.py.
+
+N players finish at random moments within --spread seconds. Each one
+saves a score and then loads the leaderboard, as run.py does. The
+fake allows --limit requests per --window seconds, so a short window
+compresses a minute of real quota into a quick run:
+
+    python3 benchmarks/sheets_quota.py --players 100 --window 6
+
+The players are split between --processes processes, as the launcher
+runs one quiz process per player; every process charges the same
+quota, although each keeps its own copy of the sheet. The burst is
+repeated three times. First every call goes straight to the fake,
+which is what the store did before RequestScheduler. Then it goes
+through a scheduler in each process with a rate matched to the fake's
+quota, and finally through schedulers that share that rate via a
+SharedTokenBucket, as the store does by default. For each run the
+benchmark reports the API calls made, the 429s the fake returned, the
+operations that failed, and the latency per operation.
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import tempfile
+import threading
+import time
+from datetime import date
+from multiprocessing.managers import BaseManager
+
+from fake_sheets import Quota, quota_sheets
+from harness import percentile
+from sheets import RequestScheduler, SharedTokenBucket
+from storage import SheetsScoreStore
+
+
+class DirectScheduler:
+    """Every request made at once, on the caller's thread."""
+
+    def call(self, fn, *args, priority=None, key=None, **kwargs):
+        return fn(*args, **kwargs)
+
+
+class QuotaManager(BaseManager):
+    """Serves one Quota to every benchmark process."""
+
+
+QuotaManager.register("Quota", Quota)
+
+
+def play(store, index, delay, latencies, failures):
+    time.sleep(delay)
+    today = date.today().isoformat()
+    row = (f"Player {index}", random.randint(0, 10), today)
+    for name, operation in (
+        ("save", lambda: store.save_best_scores("Easy", [row])),
+        ("board", lambda: store.top_scores("Easy", 10)),
+    ):
+        started = time.perf_counter()
+        try:
+            operation()
+        except Exception:
+            failures[name] += 1
+        else:
+            latencies[name].append(time.perf_counter() - started)
+
+
+def play_all(args, quota, make_scheduler, indices, results):
+    """One process's share of the players; reports to `results`."""
+    store = SheetsScoreStore(quota_sheets(quota), scheduler=make_scheduler())
+    latencies = {"save": [], "board": []}
+    failures = {"save": 0, "board": 0}
+    players = [
+        threading.Thread(
+            target=play,
+            args=(store, i, random.uniform(0, args.spread), latencies,
+                  failures),
+        )
+        for i in indices
+    ]
+    for player in players:
+        player.start()
+    for player in players:
+        player.join()
+    results.put((latencies, failures))
+
+
+def run(args, make_scheduler, label):
+    context = multiprocessing.get_context("fork")
+    latencies = {"save": [], "board": []}
+    failures = {"save": 0, "board": 0}
+    with QuotaManager(ctx=context) as manager:
+        quota = manager.Quota(args.limit, args.window, args.latency)
+        results = context.Queue()
+        processes = [
+            context.Process(
+                target=play_all,
+                args=(args, quota, make_scheduler,
+                      range(i, args.players, args.processes), results),
+            )
+            for i in range(args.processes)
+        ]
+        started = time.perf_counter()
+        for process in processes:
+            process.start()
+        for _ in processes:
+            times, failed = results.get()
+            for name in latencies:
+                latencies[name] += times[name]
+                failures[name] += failed[name]
+        for process in processes:
+            process.join()
+        elapsed = time.perf_counter() - started
+        calls, rejected = quota.summary()
+
+    print(f"{label}: {elapsed:.1f} s")
+    print(f"  API calls: {sum(calls.values())} "
+          f"({', '.join(f'{k} {v}' for k, v in sorted(calls.items()))})")
+    print(f"  429s: {rejected}")
+    for name, times in latencies.items():
+        print(f"  {name}: {len(times)} ok, {failures[name]} failed, "
+              f"p50 {percentile(times, 50) * 1000:.0f} ms, "
+              f"p99 {percentile(times, 99) * 1000:.0f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("-n", "--players", type=int, default=100)
+    parser.add_argument("-p", "--processes", type=int, default=10)
+    parser.add_argument("--spread", type=float, default=5.0)
+    parser.add_argument("--limit", type=int, default=60)
+    parser.add_argument("--window", type=float, default=6.0)
+    parser.add_argument("--latency", type=float, default=0.02)
+    args = parser.parse_args()
+
+    run(args, DirectScheduler, "direct")
+    # Leave a little headroom below the quota for the burst
+    rate = (args.limit - 10) * 60 / args.window
+    run(args, lambda: RequestScheduler(rate=rate), "per-process")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "sheets-quota")
+        run(
+            args,
+            lambda: RequestScheduler(bucket=SharedTokenBucket(path, rate)),
+            "shared",
+        )
+
+
+if __name__ == "__main__":
+    main()
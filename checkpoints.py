@@ -0,0 +1,102 @@
+import json
+import os
+import re
+import time
+
+# Session tokens come from the browser, so only plain ids are accepted
+TOKEN_PATTERN = re.compile(r"^[A-Za-z0-9_-]{8,64}$")
+
+
+def valid_token(token):
+    return bool(token) and TOKEN_PATTERN.match(token) is not None
+
+
+class CheckpointStore:
+    """
+    Progress of unfinished games, one small JSON file per session token.
+
+    A game saves its state after every answer, so a player whose
+    connection drops (and whose process is killed) can reconnect with
+    the same token and carry on from the next question. Files are
+    replaced atomically and ignored once older than `ttl` seconds;
+    sweep() deletes those left behind by games that were abandoned.
+    """
+
+    def __init__(self, directory=".sessions", ttl=1800):
+        self.directory = directory
+        self.ttl = ttl
+
+    def _path(self, token):
+        return os.path.join(self.directory, f"{token}.json")
+
+    def save(self, token, state):
+        """Store the state dict for a session."""
+        if not valid_token(token):
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(token)
+        with open(path + ".tmp", "w", encoding="utf-8") as checkpoint:
+            json.dump(state, checkpoint, separators=(",", ":"))
+        os.replace(path + ".tmp", path)
+
+    def load(self, token):
+        """Return a session's saved state, or None if there is none."""
+        if not valid_token(token):
+            return None
+        path = self._path(token)
+        try:
+            if time.time() - os.path.getmtime(path) > self.ttl:
+                self.delete(token)
+                return None
+            with open(path, encoding="utf-8") as checkpoint:
+                return json.load(checkpoint)
+        except (OSError, ValueError):
+            return None
+
+    def delete(self, token):
+        """Forget a session, e.g. once its game is finished."""
+        if not valid_token(token):
+            return
+        try:
+            os.remove(self._path(token))
+        except FileNotFoundError:
+            pass
+
+    def sweep(self):
+        """
+        Delete checkpoints older than `ttl`, along with temporary and
+        handoff files a killed process left behind; return the count.
+        """
+        removed = 0
+        try:
+            entries = os.listdir(self.directory)
+        except FileNotFoundError:
+            return removed
+        cutoff = time.time() - self.ttl
+        for entry in entries:
+            if not entry.endswith((".json", ".tmp", ".handoff")):
+                continue
+            path = os.path.join(self.directory, entry)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+                    removed += 1
+            except OSError:
+                pass  # Resumed, finished or swept by another process
+        return removed
+
+    def take_handoff(self, pid):
+        """
+        Return the token the launcher left for a pooled worker, if any.
+
+        Warm workers are spawned before anyone connects, so the launcher
+        writes the player's token to <pid>.handoff before waking one.
+        """
+        path = os.path.join(self.directory, f"{pid}.handoff")
+        try:
+            with open(path, encoding="utf-8") as handoff:
+                token = handoff.read().strip()
+            os.remove(path)
+        except OSError:
+            return None
+        return token if valid_token(token) else None
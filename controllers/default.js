@@ -1,10 +1,52 @@
 const Pty = require('node-pty');
 const fs = require('fs');
+const net = require('net');
+
+// "host:port" of a running `python3 server.py`. When set, every websocket
+// becomes a session on that one process instead of a new `python3 run.py`.
+const QUIZ_SERVER = process.env.QUIZ_SERVER;
+
+// Warm worker pool: QUIZ_POOL_SIZE idle `python3 run.py` processes are kept
+// imported and authenticated, waiting for SIGUSR1 to start drawing. No more
+// than QUIZ_POOL_MAX workers (idle and busy) run at once to bound memory.
+const POOL_SIZE = parseInt(process.env.QUIZ_POOL_SIZE || '0');
+const POOL_MAX = parseInt(process.env.QUIZ_POOL_MAX || '50');
+// Where run.py keeps game checkpoints; pooled workers also find the
+// token of the player they are handed here (see take_handoff in checkpoints.py).
+const CHECKPOINT_DIR = process.env.QUIZ_CHECKPOINT_DIR || '.sessions';
+const TOKEN_PATTERN = /^[A-Za-z0-9_-]{8,64}$/;
+// Written by a warm worker once it is waiting for SIGUSR1 (WARM_READY in
+// run.py). Until then the signal would kill it, so it is not handed out.
+const READY_MARKER = '\x1b]quiz-ready\x07';
+var idleWorkers = [];
+var startingWorkers = 0;
+var totalWorkers = 0;
+// Warm workers that exited before they were ready, in a row. The pool is
+// refilled after a growing delay meanwhile, so a worker that crashes on
+// import (say a bad QUIZ_SCORE_BACKEND) is not respawned in a tight loop.
+var startFailures = 0;
+var replenishTimer = null;
+
+// With QUIZ_METRICS set, time from websocket open to the first byte of
+// output is collected per start path (cold, warm or server) and logged
+// every QUIZ_METRICS_INTERVAL seconds, in the same shape as metrics.py.
+const METRICS = !!process.env.QUIZ_METRICS;
+const METRICS_INTERVAL = parseFloat(process.env.QUIZ_METRICS_INTERVAL || '60');
+const BOUNDS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000];
+var histograms = {};
+
+// Output from a player's process is batched into one websocket frame per
+// QUIZ_COALESCE_MS window, sent early once QUIZ_COALESCE_BYTES are
+// waiting. QUIZ_COALESCE_MS=0 sends every chunk as it arrives.
+const COALESCE_MS = parseInt(process.env.QUIZ_COALESCE_MS || '5');
+const COALESCE_BYTES = parseInt(process.env.QUIZ_COALESCE_BYTES || '16384');
 
 exports.install = function () {
 
     ROUTE('/');
     WEBSOCKET('/', socket, ['raw']);
+    if (!QUIZ_SERVER)
+        replenishPool();
 
 };
 
@@ -15,28 +57,43 @@ function socket() {
 
     this.on('open', function (client) {
 
+        // The page's session token lets a reconnecting player resume
+        var session = client.query && client.query.session;
+        if (!TOKEN_PATTERN.test(session || ''))
+            session = null;
+
         // Spawn terminal
-        client.tty = Pty.spawn('python3', ['run.py'], {
-            name: 'xterm-color',
-            cols: 80,
-            rows: 24,
-            cwd: process.env.PWD,
-            env: process.env
-        });
+        var openedAt = process.hrtime.bigint();
+        var path = QUIZ_SERVER ? 'server' : (idleWorkers.length ? 'warm' : 'cold');
+        client.tty = QUIZ_SERVER ? connectSession(QUIZ_SERVER, session) : acquireWorker(session);
+        if (!client.tty) {
+            client.send('Too many players right now, please try again shortly.\r\n');
+            client.close();
+            return;
+        }
+
+        client.output = coalescer(client);
 
         client.tty.on('exit', function (code, signal) {
+            client.output.flush();
             client.tty = null;
             client.close();
             console.log("Process killed");
         });
 
         client.tty.on('data', function (data) {
-            client.send(data);
+            if (openedAt !== null) {
+                if (METRICS)
+                    observe('launcher.first_byte.' + path, Number(process.hrtime.bigint() - openedAt) / 1e6);
+                openedAt = null;
+            }
+            client.output.push(data);
         });
 
     });
 
     this.on('close', function (client) {
+        client.output && client.output.discard();
         if (client.tty) {
             client.tty.kill(9);
             client.tty = null;
@@ -57,4 +114,196 @@ if (process.env.CREDS != null) {
             socket.emit("console_output", "Error saving credentials: " + err);
         }
     });
-}
\ No newline at end of file
+}
+
+// Collects output for one client and sends it in as few frames as the
+// COALESCE_MS / COALESCE_BYTES limits allow.
+function coalescer(client) {
+    var chunks = [];
+    var size = 0;
+    var timer = null;
+
+    function flush() {
+        if (timer) {
+            clearTimeout(timer);
+            timer = null;
+        }
+        if (chunks.length) {
+            client.send(chunks.length === 1 ? chunks[0] : chunks.join(''));
+            chunks = [];
+            size = 0;
+        }
+    }
+
+    return {
+        push: function (data) {
+            if (!COALESCE_MS) {
+                client.send(data);
+                return;
+            }
+            chunks.push(data);
+            size += data.length;
+            if (size >= COALESCE_BYTES)
+                flush();
+            else if (!timer)
+                timer = setTimeout(flush, COALESCE_MS);
+        },
+        flush: flush,
+        discard: function () {
+            if (timer)
+                clearTimeout(timer);
+            timer = null;
+            chunks = [];
+            size = 0;
+        }
+    };
+}
+
+function spawnWorker(warm, session) {
+    var env = process.env;
+    if (warm)
+        env = Object.assign({}, process.env, { QUIZ_WARM_WORKER: '1' });
+    else if (session)
+        env = Object.assign({}, process.env, { QUIZ_SESSION: session });
+    var tty = Pty.spawn('python3', ['run.py'], {
+        name: 'xterm-color',
+        cols: 80,
+        rows: 24,
+        cwd: process.env.PWD,
+        env: env
+    });
+    totalWorkers++;
+    var starting = warm;
+    if (warm) {
+        startingWorkers++;
+        var seen = '';
+        var ready = tty.onData(function (data) {
+            seen += data;
+            if (seen.indexOf(READY_MARKER) === -1) {
+                seen = seen.slice(-READY_MARKER.length);
+                return;
+            }
+            ready.dispose();
+            starting = false;
+            startingWorkers--;
+            startFailures = 0;
+            idleWorkers.push(tty);
+        });
+    }
+    tty.on('exit', function () {
+        totalWorkers--;
+        if (starting) {
+            startingWorkers--;
+            startFailures++;
+        }
+        var index = idleWorkers.indexOf(tty);
+        if (index !== -1)
+            idleWorkers.splice(index, 1);
+        scheduleReplenish();
+    });
+    return tty;
+}
+
+function replenishPool() {
+    while (idleWorkers.length + startingWorkers < POOL_SIZE && totalWorkers < POOL_MAX)
+        spawnWorker(true);
+}
+
+// Refill the pool soon, or after 1 s, 2 s, ... up to a minute while warm
+// workers keep dying before they are ready.
+function scheduleReplenish() {
+    if (replenishTimer)
+        return;
+    var delay = startFailures ? Math.min(1000 * Math.pow(2, startFailures - 1), 60000) : 0;
+    replenishTimer = setTimeout(function () {
+        replenishTimer = null;
+        replenishPool();
+    }, delay);
+}
+
+// Hand out a warm worker if one is idle, otherwise cold-start a process.
+// Returns null once the pool's QUIZ_POOL_MAX cap has been reached.
+function acquireWorker(session) {
+    if (!POOL_SIZE)
+        return spawnWorker(false, session);
+    var tty = idleWorkers.shift();
+    if (tty) {
+        if (session) {
+            // Read by the worker as soon as it wakes up
+            fs.mkdirSync(CHECKPOINT_DIR, { recursive: true });
+            fs.writeFileSync(CHECKPOINT_DIR + '/' + tty.pid + '.handoff', session);
+        }
+        tty.kill('SIGUSR1');
+    } else if (totalWorkers < POOL_MAX)
+        tty = spawnWorker(false, session);
+    scheduleReplenish();
+    return tty || null;
+}
+
+// Open a session on the quiz server, exposing the parts of the node-pty
+// interface used above (data/exit events, write and kill).
+function connectSession(address, session) {
+    const [host, port] = address.split(':');
+    const sock = net.connect(parseInt(port), host);
+    sock.setEncoding('utf8');
+    // Always sent, so the server never waits to see if a header follows
+    sock.write('QUIZ-SESSION ' + (session || '') + '\n');
+    sock.on('error', function (err) {
+        console.log('Quiz server connection error: ', err.message);
+    });
+    return {
+        on: function (event, fn) {
+            if (event === 'exit')
+                sock.on('close', function () { fn(0); });
+            else
+                sock.on(event, fn);
+        },
+        write: function (data) {
+            sock.write(data);
+        },
+        kill: function () {
+            sock.destroy();
+        }
+    };
+}
+
+function observe(name, ms) {
+    var h = histograms[name];
+    if (!h)
+        h = histograms[name] = { counts: new Array(BOUNDS_MS.length + 1).fill(0), total: 0, max: 0 };
+    var i = 0;
+    while (i < BOUNDS_MS.length && ms > BOUNDS_MS[i])
+        i++;
+    h.counts[i]++;
+    h.total += ms;
+    h.max = Math.max(h.max, ms);
+}
+
+// Upper bound of the bucket holding the pct-th percentile
+function percentile(h, count, pct) {
+    var rank = count * pct / 100;
+    var seen = 0;
+    for (var i = 0; i < h.counts.length; i++) {
+        seen += h.counts[i];
+        if (seen >= rank && h.counts[i])
+            return Math.min(i < BOUNDS_MS.length ? BOUNDS_MS[i] : h.max, h.max);
+    }
+    return h.max;
+}
+
+function reportMetrics() {
+    var parts = Object.keys(histograms).sort().map(function (name) {
+        var h = histograms[name];
+        var count = h.counts.reduce(function (a, b) { return a + b; }, 0);
+        return name + ' n=' + count
+            + ' avg=' + (h.total / count).toFixed(2) + 'ms'
+            + ' p50=' + percentile(h, count, 50).toFixed(2) + 'ms'
+            + ' p99=' + percentile(h, count, 99).toFixed(2) + 'ms'
+            + ' max=' + h.max.toFixed(2) + 'ms';
+    });
+    if (parts.length)
+        console.log('[metrics pid=' + process.pid + '] ' + parts.join(' | '));
+}
+
+if (METRICS)
+    setInterval(reportMetrics, METRICS_INTERVAL * 1000).unref();
@@ -0,0 +1,289 @@
+"""
+Headless quiz protocol: one JSON object per line on stdin and stdout.
+
+For bots, classroom integrations and load tests. Nothing is rendered
+and the terminal is never touched. Scores are saved to the same store,
+score queue and leaderboard as run.py, and the same QUIZ_* variables
+apply.
+
+    python3 headless.py < requests.jsonl
+
+Requests name an "op"; an "id", if given, is echoed in the response:
+
+    {"op": "start", "name": "Ada", "difficulty": "Easy"}
+        -> {"ok": true, "session": "...", "questions": 10}
+    {"op": "next", "session": "..."}
+        -> {"ok": true, "index": 1, "question": "...", "options": [...],
+            "time_limit": null}  ({"ok": true, "done": true} at the end)
+    {"op": "answer", "session": "...", "choice": 2}
+        -> {"ok": true, "result": "Correct", "correct": "...", "score": 1,
+            "done": false}
+    {"op": "results", "session": "..."}
+        -> {"ok": true, "score": 7, "total": 10, "rank": 3, "players": 40,
+            "answers": [...]}
+    {"op": "leaderboard", "difficulty": "Easy", "window": "week"}
+        -> {"ok": true, "rows": [{"name": ..., "score": ..., "date": ...}]}
+
+"window" is "day", "week" or "month" for the bests set in that period,
+or absent for all time. "start" also takes an optional "category",
+and a "session" id of the client's choosing so requests can be
+pipelined without waiting for the reply. Choices count from 1 as on
+screen; a null choice is a timeout. In Hard mode an answer given more
+than HARD_TIME_LIMIT seconds after its question became current also
+counts as a timeout. The score is saved with the last answer;
+"results" then forgets the session.
+Failures come back as {"ok": false, "error": "..."}.
+"""
+import json
+import os
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+
+import metrics
+import run
+from leaderboard import WINDOWS
+from questions import AnswerSheet, RESULT_NAMES, load_question_bank
+
+HARD_TIME_LIMIT = 5  # Seconds, as in the terminal game
+MAX_SESSIONS = 10000  # Oldest unfinished sessions are dropped beyond this
+
+
+class ProtocolError(Exception):
+    """A request that cannot be served; reported back to the client."""
+
+
+class HeadlessGame:
+    """One player's game, driven by protocol requests."""
+
+    __slots__ = ("name", "difficulty", "bank", "answers", "asked_at")
+
+    def __init__(self, name, difficulty, category=None):
+        self.name = name
+        self.difficulty = difficulty
+        self.bank = load_question_bank(run.QUESTIONS_FILE)
+        self.answers = AnswerSheet(
+            self.bank.sample(run.QUESTIONS_PER_GAME, category)
+        )
+        self.asked_at = time.monotonic()
+
+    @property
+    def done(self):
+        return len(self.answers.chosen) == len(self.answers)
+
+    def current(self):
+        """The question waiting for an answer."""
+        if self.done:
+            raise ProtocolError("the game is over")
+        return self.bank.question(
+            self.answers.question_ids[len(self.answers.chosen)]
+        )
+
+    def answer(self, choice):
+        """Record an answer (1-based, None for a timeout); return result."""
+        question = self.current()
+        if choice is not None:
+            # bool is an int subclass, but true is not option 1
+            if (
+                isinstance(choice, bool)
+                or not isinstance(choice, int)
+                or not 1 <= choice <= len(question.options)
+            ):
+                raise ProtocolError("choice must be an option number")
+            choice -= 1
+        if (
+            self.difficulty == "Hard"
+            and time.monotonic() - self.asked_at > HARD_TIME_LIMIT
+        ):
+            choice = None
+        result = self.answers.record(question, choice)
+        self.asked_at = time.monotonic()
+        return question, result
+
+
+class HeadlessProtocol:
+    """Maps protocol requests to games; one instance per process."""
+
+    def __init__(self):
+        self.sessions = OrderedDict()
+        self.handlers = {
+            "start": self.start,
+            "next": self.next,
+            "answer": self.answer,
+            "results": self.results,
+            "leaderboard": self.leaderboard,
+        }
+
+    def handle_line(self, line):
+        """Answer one request line with one response line (bytes)."""
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("a request must be a JSON object")
+        except ValueError as e:
+            return self._encode({"ok": False, "error": f"bad JSON: {e}"})
+        try:
+            handler = self.handlers.get(request.get("op"))
+            if handler is None:
+                raise ProtocolError(f"unknown op {request.get('op')!r}")
+            response = {"ok": True, **handler(request)}
+        except ProtocolError as e:
+            response = {"ok": False, "error": str(e)}
+        except Exception as e:
+            response = {"ok": False, "error": f"internal error: {e}"}
+        if "id" in request:
+            response["id"] = request["id"]
+        return self._encode(response)
+
+    @staticmethod
+    def _encode(response):
+        return json.dumps(response, separators=(",", ":")).encode() + b"\n"
+
+    def _game(self, request):
+        game = self.sessions.get(request.get("session"))
+        if game is None:
+            raise ProtocolError("unknown session")
+        return game
+
+    @staticmethod
+    def _difficulty(request):
+        difficulty = str(request.get("difficulty", "")).capitalize()
+        if difficulty not in ("Easy", "Hard"):
+            raise ProtocolError('difficulty must be "Easy" or "Hard"')
+        return difficulty
+
+    def start(self, request):
+        name = str(request.get("name", "")).strip()
+        error = run.name_error(name)
+        if error:
+            raise ProtocolError(error)
+        session = str(request.get("session") or uuid.uuid4().hex)
+        game = HeadlessGame(
+            name, self._difficulty(request), request.get("category")
+        )
+        if not len(game.answers):
+            raise ProtocolError("no questions in that category")
+        self.sessions.pop(session, None)
+        self.sessions[session] = game
+        if len(self.sessions) > MAX_SESSIONS:
+            self.sessions.popitem(last=False)
+        return {"session": session, "questions": len(game.answers)}
+
+    def next(self, request):
+        game = self._game(request)
+        if game.done:
+            return {"done": True}
+        question = game.current()
+        return {
+            "index": len(game.answers.chosen) + 1,
+            "question": question.text,
+            "options": list(question.options),
+            "time_limit": (
+                HARD_TIME_LIMIT if game.difficulty == "Hard" else None
+            ),
+        }
+
+    def answer(self, request):
+        game = self._game(request)
+        asked_at = game.asked_at
+        question, result = game.answer(request.get("choice"))
+        run.STATS.record(
+            game.difficulty, question.text, result, game.asked_at - asked_at
+        )
+        if game.done:
+            # Saved now, so a client that never asks for results still
+            # gets its score on the leaderboard
+            day = datetime.now().strftime("%Y-%m-%d")
+            run.SCORE_QUEUE.submit(
+                game.difficulty, game.name, game.answers.score, day
+            )
+            run.LEADERBOARD.record(
+                game.difficulty, game.name, game.answers.score, day
+            )
+        return {
+            "result": RESULT_NAMES[result],
+            "correct": question.answer_text,
+            "score": game.answers.score,
+            "done": game.done,
+        }
+
+    def results(self, request):
+        game = self._game(request)
+        if not game.done:
+            raise ProtocolError("the game is not finished")
+        del self.sessions[request["session"]]
+        answers = game.answers
+        best, rank, players = run.LEADERBOARD.standing(
+            game.difficulty, game.name, answers.score, fetch=True
+        )
+        return {
+            "name": game.name,
+            "difficulty": game.difficulty,
+            "score": answers.score,
+            "total": len(answers),
+            "best": best,
+            "rank": rank,
+            "players": players,
+            "answers": [
+                {
+                    "question": game.bank.texts[qid],
+                    "chosen": chosen + 1 if chosen >= 0 else None,
+                    "correct": game.bank.answers[qid] + 1,
+                    "result": RESULT_NAMES[result],
+                }
+                for qid, chosen, result in zip(
+                    answers.question_ids, answers.chosen, answers.results
+                )
+            ],
+        }
+
+    def leaderboard(self, request):
+        window = request.get("window")
+        if window is not None and window not in WINDOWS:
+            raise ProtocolError(f"window must be one of {', '.join(WINDOWS)}")
+        rows, _ = run.LEADERBOARD.top(self._difficulty(request), window=window)
+        return {
+            "rows": [
+                {"name": name, "score": score, "date": date}
+                for name, score, date in rows
+            ]
+        }
+
+
+def serve(protocol, infile=0, outfile=1):
+    """
+    Answer requests from a file descriptor until it is closed.
+
+    Input is read in large chunks and all the responses to one chunk go
+    out in a single write, so pipelined clients cost one system call per
+    batch rather than per request.
+    """
+    pending = b""
+    while True:
+        data = os.read(infile, 65536)
+        lines = (pending + data).split(b"\n")
+        pending = lines.pop() if data else b""
+        replies = b"".join(
+            protocol.handle_line(line) for line in lines if line.strip()
+        )
+        view = memoryview(replies)
+        while view:
+            view = view[os.write(outfile, view):]
+        if not data:
+            return
+
+
+def main():
+    metrics.start_reporter()  # No-op unless QUIZ_METRICS is set
+    run.STORE.start()
+    run.SCORE_QUEUE.start()
+    run.STATS.start()
+    try:
+        serve(HeadlessProtocol())
+    finally:
+        run.SCORE_QUEUE.close()
+
+
+if __name__ == "__main__":
+    main()
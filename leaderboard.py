@@ -0,0 +1,287 @@
+import datetime
+import heapq
+import itertools
+import threading
+import time
+from collections import Counter
+
+# Rolling windows offered on the leaderboard, in days ending today
+WINDOWS = {"day": 1, "week": 7, "month": 30}
+
+
+def window_days(window, today=None):
+    """Return the YYYY-MM-DD dates in a rolling window, newest first."""
+    today = today or datetime.date.today()
+    return [
+        (today - datetime.timedelta(days=n)).isoformat()
+        for n in range(WINDOWS[window])
+    ]
+
+
+class ScoreCounts:
+    """
+    How many rows have each score, as a Fenwick tree.
+
+    Scores are small non-negative integers, so every score value is its
+    own bucket and counting the rows above a score is O(log max_score)
+    however many rows have been added.
+    """
+
+    def __init__(self, max_score=64):
+        self.tree = [0] * (max_score + 2)
+        self.total = 0
+
+    def add(self, score, count=1):
+        score = max(score, 0)
+        if score + 1 >= len(self.tree):
+            self._grow(score)
+        self.total += count
+        i = score + 1
+        while i < len(self.tree):
+            self.tree[i] += count
+            i += i & -i
+
+    def count_at_most(self, score):
+        """Number of rows scoring `score` or less."""
+        i = min(max(score + 1, 0), len(self.tree) - 1)
+        count = 0
+        while i:
+            count += self.tree[i]
+            i -= i & -i
+        return count
+
+    def count_above(self, score):
+        return self.total - self.count_at_most(score)
+
+    def _grow(self, score):
+        size = len(self.tree) - 2
+        counts = [
+            self.count_at_most(s) - self.count_at_most(s - 1)
+            for s in range(size + 1)
+        ]
+        self.tree = [0] * (max(score, size * 2) + 2)
+        self.total = 0
+        for s, count in enumerate(counts):
+            if count:
+                self.add(s, count)
+
+
+class _Board:
+    """Cached state for one difficulty's leaderboard."""
+
+    def __init__(self):
+        # Each player's best as (score, seq, date). by_score holds the
+        # same players as {score: {name: seq}}, in the order they got
+        # there, so the all-time board is read off the highest scores.
+        self.players = {}
+        self.by_score = {}
+        # {name: (score, -seq)} per day, for the players whose best was
+        # set that day. Every player is in exactly one day, so these
+        # hold no more entries than `players`.
+        self.days = {}
+        # Merged top rows per (window, first day), dropped whenever a
+        # day partition changes
+        self.windows = {}
+        # Bumped whenever a player's best changes
+        self.version = 0
+        self.counts = ScoreCounts()
+        self.cursor = None
+        self.refreshed_at = None
+        self.built_at = None
+        # Rows we wrote ourselves and already added to the board,
+        # waiting to be seen once in the store's reads.
+        self.pending = Counter()
+
+
+class LeaderboardCache:
+    """
+    In-memory top-N leaderboard and rank index for each difficulty.
+
+    Boards rank players, not games: only each player's best score is
+    kept, so one player holds at most one place. Each board indexes the
+    bests by score for the all-time top N, groups them by the day they
+    were set and counts players per score, so a player's rank is a tree
+    lookup. The daily, weekly and monthly boards therefore show the
+    bests set within their window, not every game played in it: a
+    player who played today without beating an older best is not on
+    today's board. They merge only the days inside their window, and
+    the result is kept until one of those days changes.
+
+    Boards are refreshed from the store at most once per `ttl` seconds,
+    and a refresh only reads rows appended since the last one. Every
+    `rebuild_every` seconds a board is instead rebuilt from all rows, to
+    pick up rows rewritten by compaction. Scores saved by this process
+    are added straight away through record().
+    """
+
+    def __init__(self, store, size=10, ttl=30, rebuild_every=600):
+        self.store = store
+        self.size = size
+        self.ttl = ttl
+        self.rebuild_every = rebuild_every
+        self._boards = {}
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+
+    def _board(self, difficulty):
+        board = self._boards.get(difficulty)
+        if board is None:
+            board = self._boards[difficulty] = _Board()
+        return board
+
+    def _add(self, board, name, score, date):
+        """Add a row if it is a new best for its player; return True if so."""
+        known = board.players.get(name)
+        if known is not None and score <= known[0]:
+            return False
+        seq = next(self._seq)
+        if known is not None:
+            old_score, old_seq, old_date = known
+            del board.by_score[old_score][name]
+            if not board.by_score[old_score]:
+                del board.by_score[old_score]
+            board.counts.add(old_score, -1)
+            del board.days[old_date][name]
+            if not board.days[old_date]:
+                del board.days[old_date]
+        board.players[name] = (score, seq, date)
+        board.by_score.setdefault(score, {})[name] = seq
+        board.counts.add(score)
+        board.days.setdefault(date, {})[name] = (score, -seq)
+        board.windows.clear()
+        board.version += 1
+        return True
+
+    def refresh(self, difficulty):
+        """Fetch rows appended since the last refresh into the board."""
+        with self._lock:
+            board = self._board(difficulty)
+            rows, board.cursor = self.store.rows_since(
+                difficulty, board.cursor
+            )
+            for name, score, date in rows:
+                key = (name, score, date)
+                if board.pending[key]:
+                    board.pending[key] -= 1  # Already on the board
+                    continue
+                self._add(board, name, score, date)
+            board.refreshed_at = time.monotonic()
+
+    def rebuild(self, difficulty):
+        """
+        Replace the board with one built from every stored row.
+
+        Rows recorded here but not yet in the store are carried over.
+        """
+        rows, cursor = self.store.rows_since(difficulty)
+        board = _Board()
+        board.cursor = cursor
+        for name, score, date in rows:
+            self._add(board, name, score, date)
+        with self._lock:
+            old = self._board(difficulty)
+            pending = Counter(old.pending)
+            for row in rows:
+                if pending[tuple(row)]:
+                    pending[tuple(row)] -= 1
+            for (name, score, date), count in list(pending.items()):
+                if count and not self._add(board, name, score, date):
+                    # The store already holds a better score for this
+                    # player, so this row will never be written
+                    del pending[(name, score, date)]
+            board.pending = +pending
+            board.version = old.version + 1
+            board.refreshed_at = board.built_at = time.monotonic()
+            self._boards[difficulty] = board
+
+    def record(self, difficulty, name, score, date):
+        """Add a score this process has just saved."""
+        with self._lock:
+            board = self._board(difficulty)
+            # Only new bests are written to the store and read back
+            if self._add(board, name, score, date):
+                board.pending[(name, score, date)] += 1
+
+    def _fresh(self, difficulty):
+        """Return the board, refreshing it first if it is stale."""
+        board = self._board(difficulty)
+        now = time.monotonic()
+        if (
+            board.built_at is None
+            or now - board.built_at >= self.rebuild_every
+        ):
+            self.rebuild(difficulty)
+        elif now - board.refreshed_at >= self.ttl:
+            self.refresh(difficulty)
+        return self._board(difficulty)
+
+    def top(self, difficulty, window=None, today=None):
+        """
+        Return (rows, version): the cached top rows, best first,
+        refreshing if stale, and a number that changes whenever they
+        might. Both are read under one lock, so the version can key
+        anything derived from the rows (with the date for windowed
+        boards).
+
+        `window` is None for all time or a key of WINDOWS for the bests
+        set in that many days up to `today`.
+        """
+        board = self._fresh(difficulty)
+        with self._lock:
+            if window is None:
+                ranked = []
+                for score in sorted(board.by_score, reverse=True):
+                    for name in itertools.islice(
+                        board.by_score[score], self.size - len(ranked)
+                    ):
+                        _, seq, date = board.players[name]
+                        ranked.append((score, -seq, name, date))
+                    if len(ranked) == self.size:
+                        break
+            else:
+                days = window_days(window, today)
+                ranked = board.windows.get((window, days[0]))
+                if ranked is None:
+                    ranked = heapq.nlargest(
+                        self.size,
+                        (
+                            (score, seq, name, day)
+                            for day in days
+                            for name, (score, seq) in board.days.get(
+                                day, {}
+                            ).items()
+                        ),
+                    )
+                    board.windows[(window, days[0])] = ranked
+            version = board.version
+        rows = [(name, score, date) for score, _, name, date in ranked]
+        return rows, version
+
+    def best(self, difficulty, name):
+        """Return a player's best score, or None if they have none."""
+        board = self._fresh(difficulty)
+        with self._lock:
+            known = board.players.get(name)
+        return None if known is None else known[0]
+
+    def standing(self, difficulty, name, score, fetch=False):
+        """
+        Return (best, rank, total) for a player who just scored `score`.
+
+        Only a player's best counts, which may be an earlier game;
+        `score` stands in for it until this game has been recorded.
+        Equal scores share a rank: it is one more than the number of
+        players with a higher best. Unless `fetch` is set, the board is
+        used as it is and nothing is read from the store, so the answer
+        is None until the board has first been built.
+        """
+        if fetch:
+            board = self._fresh(difficulty)
+        else:
+            board = self._board(difficulty)
+            if board.built_at is None:
+                return None
+        with self._lock:
+            known = board.players.get(name)
+            best = score if known is None else max(known[0], score)
+            return best, board.counts.count_above(best) + 1, board.counts.total
@@ -0,0 +1,180 @@
+"""
+Maintenance commands for the score store.
+
+    python3 maintenance.py export --out archive/
+    python3 maintenance.py compact --keep-days 30 --out archive/
+    python3 maintenance.py import archive/easy-20250101-120000.csv.gz Easy
+    python3 maintenance.py stats --difficulty Hard --by timeouts
+    python3 maintenance.py stats --compact
+
+export streams every row out in pages to one gzipped CSV per difficulty.
+compact exports first, then cuts the live store down to each player's
+best row plus every row from the last --keep-days days. import appends
+rows from such a file in large batches. stats lists the questions
+players find hardest, from the per-question totals run.py keeps;
+with --compact it first folds the rows each flush appends to the
+Question Stats worksheet down to one per question.
+
+The store is the one run.py uses (QUIZ_SCORE_BACKEND). Run compact
+and stats --compact while no games are being saved: rows appended
+during them can be lost.
+Running quiz processes rebuild their leaderboards from the compacted
+rows within QUIZ_LEADERBOARD_REBUILD seconds.
+"""
+import argparse
+import csv
+import gzip
+import itertools
+import os
+from datetime import date, datetime, timedelta
+
+from question_stats import RESULTS, QuestionStats
+from storage import WORKSHEETS, get_score_store
+
+HEADER = ["Name", "Score", "Date"]
+
+
+def export_scores(store, difficulty, out_dir, page_size=5000):
+    """Write every row for a difficulty to a new .csv.gz; return its path."""
+    os.makedirs(out_dir, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    for attempt in itertools.count():
+        suffix = f"-{attempt}" if attempt else ""
+        name = f"{difficulty.lower()}-{stamp}{suffix}.csv.gz"
+        path = os.path.join(out_dir, name)
+        try:
+            archive = gzip.open(path, "xt", newline="", encoding="utf-8")
+            break
+        except FileExistsError:
+            continue  # Never overwrite an earlier archive
+    count = 0
+    with archive:
+        writer = csv.writer(archive)
+        writer.writerow(HEADER)
+        for page in store.iter_pages(difficulty, page_size):
+            writer.writerows(page)
+            count += len(page)
+    print(f"{difficulty}: exported {count} rows to {path}")
+    return path
+
+
+def read_archive(path):
+    """Yield (name, score, date) rows from an exported .csv or .csv.gz."""
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", newline="", encoding="utf-8") as archive:
+        for row in csv.reader(archive):
+            if row == HEADER or not row:
+                continue
+            yield row[0], int(row[1]), row[2]
+
+
+def compacted(rows, keep_since):
+    """
+    Each player's best row plus every row played on or after keep_since.
+
+    A player's best is their highest score, the earliest row winning a
+    tie. Rows keep their original order.
+    """
+    rows = list(rows)
+    best = {}
+    for index, (name, score, _) in enumerate(rows):
+        if name not in best or score > rows[best[name]][1]:
+            best[name] = index
+    keep = set(best.values())
+    return [
+        row
+        for index, row in enumerate(rows)
+        if index in keep or row[2] >= keep_since
+    ]
+
+
+def batches(rows, size):
+    """Split an iterable of rows into lists of at most `size`."""
+    rows = iter(rows)
+    while True:
+        batch = list(itertools.islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+def difficulties(args):
+    return [args.difficulty] if args.difficulty else list(WORKSHEETS)
+
+
+def command_export(store, args):
+    for difficulty in difficulties(args):
+        export_scores(store, difficulty, args.out, args.page_size)
+
+
+def command_compact(store, args):
+    keep_since = (date.today() - timedelta(days=args.keep_days)).isoformat()
+    for difficulty in difficulties(args):
+        # Always archive first: compaction drops rows for good
+        path = export_scores(store, difficulty, args.out, args.page_size)
+        rows = list(read_archive(path))
+        kept = compacted(rows, keep_since)
+        store.replace_scores(difficulty, kept)
+        print(f"{difficulty}: kept {len(kept)} of {len(rows)} rows")
+
+
+def command_import(store, args):
+    count = 0
+    for batch in batches(read_archive(args.file), args.batch_size):
+        store.append_scores(args.difficulty, batch)
+        count += len(batch)
+    print(f"{args.difficulty}: imported {count} rows from {args.file}")
+
+
+def command_stats(store, args):
+    if args.compact:
+        store.compact_question_stats()
+    stats = QuestionStats(store)
+    hardest = stats.hardest(args.difficulty, args.limit, args.by)
+    if not hardest:
+        print("No answers recorded yet")
+    for (difficulty, question), counter in hardest:
+        times = counter.times
+        print(
+            f"{difficulty:<4} {counter.correct / counter.attempts:6.1%} "
+            f"correct {counter.timeouts / counter.attempts:6.1%} timeouts "
+            f"n={counter.attempts:<6} avg {times.total / times.count:6.0f} "
+            f"ms p90 {times.percentile(90):6.0f} ms  {question}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export = commands.add_parser("export", help="archive rows to .csv.gz")
+    compact = commands.add_parser(
+        "compact", help="archive, then keep best and recent rows"
+    )
+    for command in (export, compact):
+        command.add_argument("--out", default="archive")
+        command.add_argument("--page-size", type=int, default=5000)
+        command.add_argument("--difficulty", choices=list(WORKSHEETS))
+    export.set_defaults(func=command_export)
+    compact.add_argument("--keep-days", type=int, default=30)
+    compact.set_defaults(func=command_compact)
+
+    bulk = commands.add_parser("import", help="append rows from an archive")
+    bulk.add_argument("file")
+    bulk.add_argument("difficulty", choices=list(WORKSHEETS))
+    bulk.add_argument("--batch-size", type=int, default=1000)
+    bulk.set_defaults(func=command_import)
+
+    stats = commands.add_parser("stats", help="list the hardest questions")
+    stats.add_argument("--difficulty", choices=list(WORKSHEETS))
+    stats.add_argument("--by", choices=RESULTS, default="correct")
+    stats.add_argument("--limit", type=int, default=10)
+    stats.add_argument("--compact", action="store_true")
+    stats.set_defaults(func=command_stats)
+
+    args = parser.parse_args()
+    args.func(get_score_store().start(), args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+import atexit
+import bisect
+import os
+import sys
+import threading
+import time
+
+# QUIZ_METRICS names where the periodic metrics line goes: a file path,
+# or "-" for stderr. Unset disables all timing.
+TARGET = os.environ.get("QUIZ_METRICS")
+ENABLED = bool(TARGET)
+INTERVAL = float(os.environ.get("QUIZ_METRICS_INTERVAL", 60))
+
+# Upper bucket bounds in milliseconds; the last bucket is open ended
+BOUNDS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+
+
+class Histogram:
+    """Fixed-bucket latency histogram."""
+
+    __slots__ = ("counts", "total", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(BOUNDS_MS) + 1)
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, ms):
+        self.counts[bisect.bisect_left(BOUNDS_MS, ms)] += 1
+        self.total += ms
+        self.max = max(self.max, ms)
+
+    @property
+    def count(self):
+        return sum(self.counts)
+
+    def percentile(self, pct):
+        """Upper bound of the bucket holding the pct-th percentile."""
+        rank = self.count * pct / 100
+        seen = 0
+        for bound, count in zip(BOUNDS_MS + (self.max,), self.counts):
+            seen += count
+            if seen >= rank and count:
+                return min(bound, self.max)
+        return self.max
+
+
+_histograms = {}
+_lock = threading.Lock()
+
+
+def observe(name, ms):
+    """Record one measurement in milliseconds."""
+    with _lock:
+        histogram = _histograms.get(name)
+        if histogram is None:
+            histogram = _histograms[name] = Histogram()
+        histogram.observe(ms)
+
+
+class _Timer:
+    __slots__ = ("name", "started")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.name, (time.perf_counter() - self.started) * 1000)
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def timed(name):
+    """
+    Context manager timing its block into the `name` histogram.
+
+    When metrics are disabled this returns a shared no-op object, so an
+    instrumented call costs one function call and one branch.
+    """
+    return _Timer(name) if ENABLED else _NULL_TIMER
+
+
+def format_line():
+    """Summarise every histogram on one log line."""
+    with _lock:
+        parts = [
+            f"{name} n={h.count} avg={h.total / h.count:.2f}ms "
+            f"p50={h.percentile(50):.2f}ms p99={h.percentile(99):.2f}ms "
+            f"max={h.max:.2f}ms"
+            for name, h in sorted(_histograms.items())
+        ]
+    return f"[metrics pid={os.getpid()}] " + " | ".join(parts)
+
+
+def report():
+    """Append the current metrics line to the QUIZ_METRICS target."""
+    if not _histograms:
+        return
+    line = format_line() + "\n"
+    if TARGET == "-":
+        sys.stderr.write(line)
+    else:
+        with open(TARGET, "a", encoding="utf-8") as log:
+            log.write(line)
+
+
+def start_reporter():
+    """Report every QUIZ_METRICS_INTERVAL seconds and once at exit."""
+    if not ENABLED:
+        return
+
+    def loop():
+        while True:
+            time.sleep(INTERVAL)
+            report()
+
+    threading.Thread(target=loop, name="metrics", daemon=True).start()
+    atexit.register(report)
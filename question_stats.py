@@ -0,0 +1,236 @@
+import atexit
+import json
+import os
+import threading
+import time
+import uuid
+
+import metrics
+from questions import CORRECT, WRONG
+from score_queue import claim_orphans
+
+# Order of the result counters in a stats row
+RESULTS = ("correct", "wrong", "timeouts")
+
+
+class QuestionCounter:
+    """Answer counts and a response-time histogram for one question."""
+
+    __slots__ = ("correct", "wrong", "timeouts", "times")
+
+    def __init__(self):
+        self.correct = self.wrong = self.timeouts = 0
+        self.times = metrics.Histogram()  # Milliseconds
+
+    @property
+    def attempts(self):
+        return self.correct + self.wrong + self.timeouts
+
+    def add(self, result, ms):
+        if result == CORRECT:
+            self.correct += 1
+        elif result == WRONG:
+            self.wrong += 1
+        else:
+            self.timeouts += 1
+        self.times.observe(ms)
+
+    def merge(self, correct, wrong, timeouts, total_ms, max_ms, buckets):
+        """Add the counts from a stored stats row."""
+        self.correct += correct
+        self.wrong += wrong
+        self.timeouts += timeouts
+        self.times.total += total_ms
+        self.times.max = max(self.times.max, max_ms)
+        for i, count in enumerate(buckets):
+            self.times.counts[i] += count
+
+    def row(self, difficulty, question):
+        """This counter as a (difficulty, question, ...) stats row."""
+        return (
+            difficulty,
+            question,
+            self.correct,
+            self.wrong,
+            self.timeouts,
+            self.times.total,
+            self.times.max,
+            list(self.times.counts),
+        )
+
+
+class QuestionStats:
+    """
+    Running per-question answer statistics.
+
+    record() bumps in-memory counters and, given a `spool_dir`, appends
+    one line to this process's spool file there, so it costs the same
+    however many games have been played. The counts since the last
+    flush are added to the store's totals in one batch every `interval`
+    seconds and at exit, and the spool file is then emptied. Spool
+    files left by a killed process are picked up by the next one to
+    start, as with ScoreQueue; as there, a process killed just after a
+    flush may have its counts added twice. Queries read the stored
+    totals plus whatever has not been flushed yet; raw game history is
+    never read.
+    """
+
+    def __init__(self, store, interval=60, spool_dir=None):
+        self.store = store
+        self.interval = interval
+        self.spool_dir = spool_dir
+        self.spool_path = spool_dir and os.path.join(
+            spool_dir, f"{os.getpid()}-{uuid.uuid4().hex[:8]}.jsonl"
+        )
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+
+    def record(self, difficulty, question, result, seconds):
+        """Count one answer (a questions.CORRECT/WRONG/TIMEOUT result)."""
+        key = (difficulty, question)
+        if self.spool_path:
+            self.start()
+        with self._lock:
+            counter = self._pending.get(key)
+            if counter is None:
+                counter = self._pending[key] = QuestionCounter()
+            counter.add(result, seconds * 1000)
+            if self.spool_path:
+                with open(self.spool_path, "a", encoding="utf-8") as spool:
+                    spool.write(
+                        json.dumps([difficulty, question, result, seconds])
+                        + "\n"
+                    )
+
+    def _merge(self, rows):
+        """Add stats rows to the pending counts; call with _lock held."""
+        for row in rows:
+            key = (row[0], row[1])
+            counter = self._pending.get(key)
+            if counter is None:
+                counter = self._pending[key] = QuestionCounter()
+            counter.merge(*row[2:])
+
+    def _rewrite_spool(self):
+        """Replace the spool file with the pending counts, one per row."""
+        if not self.spool_path:
+            return
+        tmp = self.spool_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as spool:
+            for key, counter in self._pending.items():
+                spool.write(json.dumps(counter.row(*key)) + "\n")
+        os.replace(tmp, self.spool_path)
+
+    def _recover(self):
+        """Merge in the spool files left by processes that have exited."""
+        claimed = claim_orphans(self.spool_dir, self.spool_path)
+        for _, rows in claimed:
+            for row in rows:
+                if len(row) == 4:  # One answer, as record() spools it
+                    counter = QuestionCounter()
+                    counter.add(row[2], row[3] * 1000)
+                    row = counter.row(*row[:2])
+                self._merge([row])
+        if claimed:
+            self._rewrite_spool()
+        for path, _ in claimed:
+            os.remove(path)  # Only once the counts are in our spool
+
+    def flush(self):
+        """Add the pending counts to the store in one batch."""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            if not pending:
+                return
+            try:
+                with metrics.timed("stats.flush"):
+                    self.store.add_question_stats(
+                        [
+                            counter.row(*key)
+                            for key, counter in pending.items()
+                        ]
+                    )
+            except Exception:
+                # Keep the counts for the next flush; the spool file
+                # still holds them
+                with self._lock:
+                    self._merge(
+                        counter.row(*key) for key, counter in pending.items()
+                    )
+                raise
+            with self._lock:
+                self._rewrite_spool()
+
+    def start(self):
+        """
+        Recover orphaned spool files, then flush every `interval`
+        seconds and close() at exit.
+        """
+        with self._lock:
+            if self._thread is not None:
+                return self
+            if self.spool_dir:
+                os.makedirs(self.spool_dir, exist_ok=True)
+                self._recover()
+            self._thread = threading.Thread(
+                target=self._run, name="question-stats", daemon=True
+            )
+            self._thread.start()
+        atexit.register(self.close)
+        return self
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            self._try_flush()
+
+    def _try_flush(self):
+        try:
+            self.flush()
+        except Exception:
+            pass  # Store unreachable; the spool keeps the counts
+
+    def close(self, timeout=5):
+        """
+        Try to flush before exiting, for at most `timeout` seconds.
+        Counts that could not be sent stay in the spool file.
+        """
+        flusher = threading.Thread(
+            target=self._try_flush, name="question-stats-close", daemon=True
+        )
+        flusher.start()
+        flusher.join(timeout)
+
+    def totals(self, difficulty=None):
+        """Return {(difficulty, question): QuestionCounter} so far."""
+        totals = {}
+        rows = list(self.store.question_stats())
+        with self._lock:
+            rows += [
+                counter.row(*key) for key, counter in self._pending.items()
+            ]
+        for row in rows:
+            if difficulty is None or row[0] == difficulty:
+                key = (row[0], row[1])
+                totals.setdefault(key, QuestionCounter()).merge(*row[2:])
+        return totals
+
+    def hardest(self, difficulty=None, limit=10, by="correct"):
+        """
+        The questions with the lowest correct rate, or with the highest
+        `by` rate for "wrong" or "timeouts", as (key, counter) pairs.
+        """
+        if by not in RESULTS:
+            raise ValueError(f"by must be one of {', '.join(RESULTS)}")
+        sign = 1 if by == "correct" else -1
+        ranked = sorted(
+            self.totals(difficulty).items(),
+            key=lambda item: (
+                sign * getattr(item[1], by) / item[1].attempts,
+                -item[1].attempts,
+            ),
+        )
+        return ranked[:limit]
@@ -0,0 +1,182 @@
+import csv
+import functools
+import json
+import os
+import pickle
+import random
+from array import array
+
+# Result codes stored for each answer in an AnswerSheet
+CORRECT, WRONG, TIMEOUT = 0, 1, 2
+RESULT_NAMES = ("Correct", "Wrong", "Timeout")
+# Part of the compiled bank's cache stamp; bump it whenever QuestionBank
+# changes shape, so caches pickled by older code are rebuilt
+BANK_FORMAT = 1
+
+
+class Question:
+    """One question as read from a QuestionBank."""
+
+    __slots__ = ("qid", "text", "options", "answer")
+
+    def __init__(self, qid, text, options, answer):
+        self.qid = qid
+        self.text = text
+        self.options = options  # Tuple shared with the bank
+        self.answer = answer  # Index into options
+
+    @property
+    def answer_text(self):
+        return self.options[self.answer]
+
+
+class AnswerSheet:
+    """
+    One game's questions and answers as three small arrays.
+
+    For each question it keeps the bank id, the chosen option index
+    (-1 when unanswered) and a result code. Texts are looked up in the
+    shared bank when needed rather than copied into every session.
+    """
+
+    __slots__ = ("question_ids", "chosen", "results")
+
+    def __init__(self, question_ids):
+        self.question_ids = array("I", question_ids)
+        self.chosen = array("b")
+        self.results = array("B")
+
+    def __len__(self):
+        return len(self.question_ids)
+
+    def record(self, question, chosen):
+        """Record the option index chosen (None on timeout)."""
+        if chosen is None:
+            result = TIMEOUT
+        elif chosen == question.answer:
+            result = CORRECT
+        else:
+            result = WRONG
+        self.chosen.append(-1 if chosen is None else chosen)
+        self.results.append(result)
+        return result
+
+    @property
+    def score(self):
+        return self.results.count(CORRECT)
+
+
+class QuestionBank:
+    """
+    Every quiz question, compiled into a compact indexed form.
+
+    Questions are stored as parallel tuples addressed by an integer id,
+    with the answer kept as an index into the options. Ids are indexed
+    by category, by difficulty and by both, so a game can sample from
+    any slice without copying or shuffling the whole bank.
+    """
+
+    def __init__(self, questions):
+        texts, options, answers = [], [], array("B")
+        categories, difficulties = [], []
+        self.index = {}
+        for qid, question in enumerate(questions):
+            texts.append(question["question"])
+            opts = tuple(question["options"])
+            options.append(opts)
+            answers.append(opts.index(question["answer"]))
+            category = question.get("category", "general").lower()
+            difficulty = question.get("difficulty", "medium").lower()
+            categories.append(category)
+            difficulties.append(difficulty)
+            for key in (
+                (None, None),
+                (category, None),
+                (None, difficulty),
+                (category, difficulty),
+            ):
+                self.index.setdefault(key, array("I")).append(qid)
+        self.texts = tuple(texts)
+        self.options = tuple(options)
+        self.answers = answers
+        self.categories = tuple(categories)
+        self.difficulties = tuple(difficulties)
+
+    def __len__(self):
+        return len(self.texts)
+
+    def ids(self, category=None, difficulty=None):
+        """Return the ids matching a category and/or difficulty."""
+        key = (
+            category.lower() if category else None,
+            difficulty.lower() if difficulty else None,
+        )
+        return self.index.get(key, array("I"))
+
+    def sample(self, count, category=None, difficulty=None):
+        """Pick up to `count` distinct random question ids."""
+        ids = self.ids(category, difficulty)
+        # Sampling positions from a range leaves the id array untouched
+        picks = random.sample(range(len(ids)), min(count, len(ids)))
+        return [ids[i] for i in picks]
+
+    def question(self, qid):
+        """Return question `qid`."""
+        return Question(
+            qid, self.texts[qid], self.options[qid], self.answers[qid]
+        )
+
+
+def read_questions(path):
+    """
+    Read question dicts from a JSON list or a CSV file.
+
+    CSV files have category, difficulty, question and answer columns
+    followed by one column per option (option_1, option_2, ...).
+    """
+    if path.lower().endswith(".csv"):
+        with open(path, newline="", encoding="utf-8") as source:
+            questions = []
+            for row in csv.DictReader(source):
+                options = [
+                    row[key]
+                    for key in sorted(
+                        (k for k in row if k.startswith("option_")),
+                        key=lambda k: int(k.split("_")[1]),
+                    )
+                    if row[key]
+                ]
+                questions.append(dict(row, options=options))
+            return questions
+    with open(path, encoding="utf-8") as source:
+        return json.load(source)
+
+
+@functools.lru_cache(maxsize=None)
+def load_question_bank(path="questions.json"):
+    """
+    Load and compile a question file once per process.
+
+    The compiled bank is also pickled next to the source file, so later
+    processes skip parsing as long as the source is unchanged. A cache
+    that can't be loaded for any reason is simply rebuilt.
+    """
+    stat = os.stat(path)
+    stamp = (BANK_FORMAT, stat.st_mtime_ns, stat.st_size)
+    compiled = path + ".compiled"
+    try:
+        with open(compiled, "rb") as cache:
+            cached_stamp, bank = pickle.load(cache)
+        if cached_stamp == stamp:
+            return bank
+    except Exception:
+        pass  # Missing, torn, or pickled from classes that have changed
+    bank = QuestionBank(read_questions(path))
+    tmp = f"{compiled}.{os.getpid()}.tmp"  # Processes may race to write
+    try:
+        with open(tmp, "wb") as cache:
+            pickle.dump((stamp, bank), cache, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, compiled)
+    except OSError:
+        pass  # Read-only checkout: just compile every time
+    return bank
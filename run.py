@@ -1,438 +1,630 @@
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
-import os
-import random
 import time
-from datetime import datetime
-from rich.console import Console
-from rich.table import Table
-from rich.progress import track
-from pyfiglet import Figlet
-import re
-import threading
-
-SCOPE = [
-    "https://www.googleapis.com/auth/spreadsheets",
-    "https://www.googleapis.com/auth/drive.file",
-    "https://www.googleapis.com/auth/drive",
-]
-CREDS = ServiceAccountCredentials.from_json_keyfile_name("creds.json", SCOPE)
-CLIENT = gspread.authorize(CREDS)
-# Open Google Sheet and define both worksheets
-SHEET = CLIENT.open("QuizScores")
-EASY_SCORES = SHEET.worksheet("Easy Scores")
-HARD_SCORES = SHEET.worksheet("Hard Scores")
-
-console = Console()
-
-
-def clear_terminal():
+
+START_TIME = time.perf_counter()
+
+import math  # noqa: E402
+import os  # noqa: E402
+import signal  # noqa: E402
+import sys  # noqa: E402
+from datetime import datetime  # noqa: E402
+import re  # noqa: E402
+import metrics  # noqa: E402
+from storage import get_score_store  # noqa: E402
+from leaderboard import LeaderboardCache  # noqa: E402
+from score_queue import ScoreQueue  # noqa: E402
+from terminal import Terminal  # noqa: E402
+from screens import ScreenCache, load_banner  # noqa: E402
+from questions import AnswerSheet, RESULT_NAMES  # noqa: E402
+from questions import load_question_bank  # noqa: E402
+from checkpoints import CheckpointStore  # noqa: E402
+from question_stats import QuestionStats  # noqa: E402
+
+# Google Sheets by default, or a local SQLite file (QUIZ_SCORE_BACKEND).
+# A Sheets store connects in the background and is only awaited when a
+# score is saved or the leaderboard is shown.
+STORE = get_score_store()
+# Question file (JSON or CSV), compiled once and shared by every game
+QUESTIONS_FILE = os.environ.get("QUIZ_QUESTIONS") or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "questions.json"
+)
+QUESTIONS_PER_GAME = 10
+# Finished games are spooled locally and sent in the background
+SCORE_QUEUE = ScoreQueue(
+    STORE, spool_dir=os.environ.get("QUIZ_SPOOL_DIR", ".score_spool")
+)
+# Top 10 per difficulty, refreshed incrementally every QUIZ_LEADERBOARD_TTL
+# seconds and rebuilt from every row every QUIZ_LEADERBOARD_REBUILD
+LEADERBOARD = LeaderboardCache(
+    STORE,
+    size=10,
+    ttl=float(os.environ.get("QUIZ_LEADERBOARD_TTL", 30)),
+    rebuild_every=float(os.environ.get("QUIZ_LEADERBOARD_REBUILD", 600)),
+)
+# Per-question answer counts, spooled next to the scores and added to
+# the store every QUIZ_STATS_INTERVAL seconds rather than after every answer
+STATS = QuestionStats(
+    STORE,
+    interval=float(os.environ.get("QUIZ_STATS_INTERVAL", 60)),
+    spool_dir=os.path.join(SCORE_QUEUE.spool_dir, "stats"),
+)
+# Written by a pooled worker once it is waiting for SIGUSR1; matched by
+# READY_MARKER in controllers/default.js
+WARM_READY = b"\x1b]quiz-ready\x07"
+# Static screens and leaderboard tables, rendered once per process
+SCREENS = ScreenCache()
+# Unfinished games by session token, so a dropped player can resume
+CHECKPOINTS = CheckpointStore(
+    os.environ.get("QUIZ_CHECKPOINT_DIR", ".sessions"),
+    ttl=float(os.environ.get("QUIZ_CHECKPOINT_TTL", 1800)),
+)
+
+
+def report_timing(label, seconds):
     """
-    Clears the terminal window prior to new content.
+    Write a timing measurement to stderr when QUIZ_TIMING is set.
     """
-    os.system("cls" if os.name == "nt" else "clear")
+    if os.environ.get("QUIZ_TIMING"):
+        sys.stderr.write(f"[timing] {label}: {seconds * 1000:.1f} ms\n")
+
+
+# The title is drawn without rich, so its one styled line is written
+# as the SGR sequence rich uses for bold cyan in every colour system
+TITLE_PROMPT = "Press Enter to start the quiz..."
+BOLD_CYAN = "\x1b[1;36m{}\x1b[0m"
+
+
+def title_text(color):
+    """The title screen, with the banner pre-rendered by pyfiglet."""
+    lines = [line.center(80) for line in load_banner().splitlines()]
+    lines += [
+        "Welcome to the Travel & Geography Quiz!".center(80),
+        "Test your knowledge and see how well you score.\n".center(80),
+        "\nInstructions:",
+        "1. Answer each question by typing the number of your choice.",
+        "2. Your final score will be displayed at the end.",
+        "3. View the leaderboard to compare scores with others.\n",
+        BOLD_CYAN.format(TITLE_PROMPT) if color else TITLE_PROMPT,
+    ]
+    return "\n".join(lines) + "\n"
 
 
-def title_screen():
+def title_screen(terminal):
     """
-    Display a title screen using pyfiglet.
+    Display the title screen.
+
+    It is plain text, so the first frame does not wait for rich to be
+    imported; that happens in the background while the player reads it.
     """
-    f = Figlet(font="big", width=80)
-    clear_terminal()
-    rendered_text = f.renderText("TRAVEL QUIZ").splitlines()
-    for line in rendered_text:
-        print(line.center(80))
-    print("Welcome to the Travel & Geography Quiz!".center(80))
-    print("Test your knowledge and see how well you score.\n".center(80))
-    print("\nInstructions:")
-    print("1. Answer each question by typing the number of your choice.")
-    print("2. Your final score will be displayed at the end.")
-    print("3. View the leaderboard to compare scores with others.\n")
-    console.print("[bold cyan]Press Enter to start the quiz...[/bold cyan]")
-    input()
-    clear_terminal()
+    terminal.clear()
+    terminal.write(title_text(terminal.wants_color()))
+    terminal.flush()
+    report_timing("time to first frame", time.perf_counter() - START_TIME)
+    terminal.preload_console()
+    terminal.input()
+    terminal.clear()
+
+
+def name_error(name):
+    """Return why a player name is not allowed, or None if it is fine."""
+    name = name.strip()
+
+    # Check if name contains only alphabetic characters and spaces
+    if not re.match(r"^[A-Za-zÀ-ÖØ-öø-ÿ\s]+$", name):
+        return (
+            "Invalid name. Use only alphabetic "
+            "characters (A-Z, a-z) and spaces."
+        )
+
+    # Ensure name is between 2 and 20 characters
+    if len(name) < 2 or len(name) > 20:
+        return "Invalid name length. Must be between 2 and 20 characters."
+
+    # Prevent multiple consecutive spaces
+    if "  " in name:
+        return "Invalid name. No consecutive spaces allowed."
+
+    return None
 
 
 class Quiz:
     """A class to manage the Travel & Geography Quiz."""
 
-    def __init__(self):
+    def __init__(self, terminal=None, session=None):
         """Initialize the Quiz instance."""
-        self.console = Console()
+        self.terminal = terminal or Terminal()
+        self.console = self.terminal.console
+        self.session = session  # Token the game is checkpointed under
 
     def validate_name(self, name):
         """Validate that the name is alphabetic and has a reasonable length."""
-        name = name.strip()
-
-        # Check if name contains only alphabetic characters and spaces
-        if not re.match(r"^[A-Za-zÀ-ÖØ-öø-ÿ\s]+$", name):
-            console.print(
-                "[red]Invalid name. Use only alphabetic "
-                "characters (A-Z, a-z) and spaces.[/red]"
-            )
-            return False
-
-        # Ensure name is between 2 and 20 characters
-        if len(name) < 2 or len(name) > 20:
-            console.print(
-                "[red]Invalid name length. "
-                "Must be between 2 and 20 characters.[/red]"
-            )
+        error = name_error(name)
+        if error:
+            self.console.print(f"[red]{error}[/red]")
             return False
-
-        # Prevent multiple consecutive spaces
-        if "  " in name:
-            console.print(
-                "[red]Invalid name. No consecutive spaces allowed.[/red]"
-            )
-            return False
-
         return True
 
     def get_user_info(self):
         """Collect and validate user information."""
         while True:
-            name = input("Enter your name:\n").strip()
+            name = self.terminal.input("Enter your name:\n").strip()
             if self.validate_name(name):
                 self.name = name
-                clear_terminal()
+                self.terminal.clear()
                 break
 
         # Ask user for difficulty mode
         while True:
-            console.print("\n[bold cyan]Choose Difficulty Level:[/bold cyan]")
-            console.print(
-                "1. Easy Mode (No Timer)\n2. Hard Mode (5-second Timer)"
+            SCREENS.write(
+                self.terminal,
+                "difficulty menu",
+                lambda console: console.print(
+                    "\n[bold cyan]Choose Difficulty Level:[/bold cyan]\n"
+                    "1. Easy Mode (No Timer)\n2. Hard Mode (5-second Timer)"
+                ),
             )
-            choice = input("Enter 1 for Easy or 2 for Hard:\n").strip()
+            choice = self.terminal.input(
+                "Enter 1 for Easy or 2 for Hard:\n"
+            ).strip()
 
             if choice == "1":
                 self.difficulty = "Easy"
-                self.sheet = EASY_SCORES
                 break
             elif choice == "2":
                 self.difficulty = "Hard"
-                self.sheet = HARD_SCORES
                 break
             else:
-                console.print(
+                self.console.print(
                     "[red]Invalid choice. Please enter 1 or 2.[/red]"
                 )
 
-        clear_terminal()
-        console.print(
+        self.terminal.clear()
+        self.console.print(
             f"[green]Welcome, {self.name}! "
             f"Playing in {self.difficulty} Mode.[/green]\n"
         )
 
-    def load_questions(self):
-        """Load questions for the quiz"""
-        self.questions = [
-            {
-                "question": "Where can you find the Christ "
-                            "the Redeemer statue?",
-                "options": ["Argentina", "Brazil", "Chile", "Mexico"],
-                "answer": "Brazil",
-            },
-            {
-                "question": "What is the capital of Canada?",
-                "options": ["Toronto", "Vancouver", "Ottawa", "Montreal"],
-                "answer": "Ottawa",
-            },
-            {
-                "question": "Which country has a red circle "
-                            "on a white background in its flag?",
-                "options": [
-                    "South Korea",
-                    "Japan",
-                    "Bangladesh",
-                    "Switzerland",
-                ],
-                "answer": "Japan",
-            },
-            {
-                "question": "Which country has the most islands in the world?",
-                "options": ["Indonesia", "Sweden", "Philippines", "Canada"],
-                "answer": "Sweden",
-            },
-            {
-                "question": "I am the highest mountain in the world. "
-                            "What am I?",
-                "options": [
-                    "K2",
-                    "Mount Kilimanjaro",
-                    "Mount Everest",
-                    "Mount McKinley",
-                ],
-                "answer": "Mount Everest",
-            },
-            {
-                "question": "What is the largest ocean on Earth?",
-                "options": [
-                    "Atlantic Ocean",
-                    "Indian Ocean",
-                    "Pacific Ocean",
-                    "Arctic Ocean",
-                ],
-                "answer": "Pacific Ocean",
-            },
-            {
-                "question": "What is the capital city of Australia?",
-                "options": ["Sydney", "Melbourne", "Canberra", "Perth"],
-                "answer": "Canberra",
-            },
-            {
-                "question": "In which country can you find Machu Picchu?",
-                "options": ["Peru", "Chile", "Mexico", "Brazil"],
-                "answer": "Peru",
-            },
-            {
-                "question": "What is the longest river in the world?",
-                "options": ["Nile", "Amazon", "Yangtze", "Mississippi"],
-                "answer": "Nile",
-            },
-            {
-                "question": "Which country is known as "
-                            "the 'Land of the Rising Sun'?",
-                "options": ["China", "Japan", "South Korea", "Thailand"],
-                "answer": "Japan",
-            },
-        ]
-
-        # Shuffle the questions
-        random.shuffle(self.questions)
+    def load_questions(self, category=None):
+        """Load questions for the quiz from the shared question bank"""
+        self.bank = load_question_bank(QUESTIONS_FILE)
+        self.answers = AnswerSheet(
+            self.bank.sample(QUESTIONS_PER_GAME, category)
+        )
 
-    def run_quiz(self):
-        """Run the quiz by presenting questions to the user."""
-        self.score = 0
-        summary = []
-
-        def countdown_timer(timer_event):
-            """Displays a countdown timer in a separate
-            place and stops if answered."""
-            for remaining in range(5, -1, -1):
-                if timer_event.is_set():
-                    return  # Exit early if the user answers
-
-                clear_terminal()
-                console.print(
-                    f"\n[bold yellow]Question {idx}: "
-                    f"{question['question']}[/bold yellow]"
-                )
-                for i, option in enumerate(question["options"], start=1):
-                    console.print(f"[bright_cyan]{i}. {option}[/bright_cyan]")
+    def checkpoint(self):
+        """Save the game so far under the session token, if there is one."""
+        if self.session:
+            CHECKPOINTS.save(
+                self.session,
+                {
+                    "name": self.name,
+                    "difficulty": self.difficulty,
+                    "questions": QUESTIONS_FILE,
+                    "question_ids": self.answers.question_ids.tolist(),
+                    "chosen": self.answers.chosen.tolist(),
+                },
+            )
 
-                console.print(
-                    f"\n[bold red]Time Left: {remaining}s[/bold red]",
-                    justify="center",
+    def resume(self, state):
+        """Restore a game saved by checkpoint(); return True on success."""
+        try:
+            if state["questions"] != QUESTIONS_FILE:
+                return False  # Saved by a game using other questions
+            bank = load_question_bank(QUESTIONS_FILE)
+            ids = state["question_ids"]
+            if not all(0 <= qid < len(bank) for qid in ids):
+                return False  # The question file has changed since
+            answers = AnswerSheet(ids)
+            for qid, chosen in zip(ids, state["chosen"]):
+                answers.record(
+                    bank.question(qid), chosen if chosen >= 0 else None
                 )
-                time.sleep(1)
-
-                if remaining == 2 and not timer_event.is_set():
-                    console.print(
-                        "\n[bold red]Hurry up! Only 2 seconds left![/bold red]"
-                    )
+            self.name = state["name"]
+            self.difficulty = state["difficulty"]
+        except (KeyError, TypeError, ValueError, OSError):
+            return False
+        self.bank = bank
+        self.answers = answers
+        return True
 
-            if not timer_event.is_set():
-                self.timeout_flag = True  # Mark as timed out
-                console.print(
-                    "\n[bold red]Timeout! Press enter to "
-                    "move to the next question...[/bold red]"
-                )
+    def show_question(self, idx, question, error=None):
+        """
+        Clear the screen and draw a question in a single write.
 
-        for idx, question in enumerate(self.questions, start=1):
-            clear_terminal()
-            console.print(
+        Returns the screen row of the countdown line so the timer can
+        rewrite just that line instead of the whole screen.
+        """
+        self.terminal.clear()
+        with self.console.capture() as capture:
+            self.console.print(
                 f"\n[bold yellow]Question {idx}: "
-                f"{question['question']}[/bold yellow]"
+                f"{question.text}[/bold yellow]"
+            )
+            for i, option in enumerate(question.options, start=1):
+                self.console.print(f"[bright_cyan]{i}. {option}[/bright_cyan]")
+        screen = capture.get()
+        timer_row = screen.count("\n") + 2  # After a blank line
+        if self.time_left is not None:
+            screen += "\n" + self.render_timer() + "\n"
+        with self.console.capture() as capture:
+            if error:
+                self.console.print(error)
+            self.console.print(
+                "\n[bold cyan]Enter your choice below:[/bold cyan]"
             )
-            for i, option in enumerate(question["options"], start=1):
-                console.print(f"[bright_cyan]{i}. {option}[/bright_cyan]")
+        self.terminal.write(screen + capture.get())
+        return timer_row
+
+    def render_timer(self):
+        """Render the countdown line for the time left."""
+        time_left = self.time_left
+        hurry = " - Hurry up!" if 0 < time_left <= 2 else ""
+        return SCREENS.render(
+            self.console,
+            ("timer", time_left),
+            lambda console: console.print(
+                f"[bold red]Time Left: {time_left}s{hurry}[/bold red]",
+                justify="center",
+            ),
+        ).rstrip("\n")
+
+    def update_timer(self, row):
+        """
+        Rewrite only the countdown line, leaving the cursor (and anything
+        the player has typed) where it is.
+        """
+        self.terminal.write(
+            f"\x1b7\x1b[{row};1H\x1b[2K{self.render_timer()}\x1b8"
+        )
 
+    def run_quiz(self):
+        """Run the quiz by presenting questions to the user."""
+        answered = len(self.answers.chosen)  # Non-zero when resumed
+        self.checkpoint()
+        for idx, qid in enumerate(
+            self.answers.question_ids[answered:], start=answered + 1
+        ):
+            question = self.bank.question(qid)
             selected_option = None
-            self.timeout_flag = False
-            timer_event = threading.Event()
-
+            timed_out = False
+            deadline = None
+            self.time_left = None
             if self.difficulty == "Hard":
-                timer_thread = threading.Thread(
-                    target=countdown_timer, args=(timer_event,)
-                )
-                timer_thread.start()
-
-            console.print("\n[bold cyan]Enter your choice below:[/bold cyan]")
-
-            while not self.timeout_flag:
-                if timer_event.is_set():
-                    break
+                deadline = time.monotonic() + 5
+                self.time_left = 5
+            self.terminal.discard_input()  # Drop keys typed too late
+            timer_row = self.show_question(idx, question)
+            asked_at = time.monotonic()
+
+            while True:
+                # In Hard mode wake up once a second to tick the countdown
+                wake_at = None
+                if deadline is not None:
+                    wake_at = min(deadline, deadline - self.time_left + 1)
 
                 try:
-                    choice = input().strip()
+                    choice = self.terminal.input(deadline=wake_at)
+                except EOFError:
+                    raise  # Disconnected: keep the checkpoint as it is
+                except Exception:
+                    break
 
-                    if self.timeout_flag:
+                if choice is None:  # Nothing typed before wake_at
+                    self.time_left = math.ceil(deadline - time.monotonic())
+                    if self.time_left <= 0:
+                        timed_out = True
+                        break
+                    self.update_timer(timer_row)
+                    continue
+
+                choice = choice.strip()
+                if choice.isdigit():
+                    choice = int(choice)
+                    if 1 <= choice <= len(question.options):
+                        selected_option = choice - 1
                         break
-
-                    if choice.isdigit():
-                        choice = int(choice)
-                        if 1 <= choice <= len(question["options"]):
-                            selected_option = question["options"][choice - 1]
-                            timer_event.set()  # Stop the timer immediately
-                            break
-                        else:
-                            console.print(
-                                "[red]Invalid choice. "
-                                "Please select a valid option.[/red]"
-                            )
                     else:
-                        console.print(
-                            "[red]Invalid input. Please enter a number.[/red]"
+                        error = (
+                            "[red]Invalid choice. "
+                            "Please select a valid option.[/red]"
                         )
-                except Exception:
-                    break
+                else:
+                    error = "[red]Invalid input. Please enter a number.[/red]"
+                # Redraw rather than scroll so the timer line stays put
+                self.show_question(idx, question, error)
+
+            response_time = time.monotonic() - asked_at
+            if timed_out:
+                self.time_left = 0
+                self.update_timer(timer_row)
+                self.console.print(
+                    "\n[bold red]Timeout! Moving to the "
+                    "next question...[/bold red]"
+                )
+                # Pause briefly so the message can be read
+                self.terminal.input(deadline=time.monotonic() + 1.5)
 
-            if self.difficulty == "Hard":
-                timer_thread.join()  # Ensure the timer stops before continuing
-
-            if self.timeout_flag:
-                result = "Timeout"
-                selected_option = "No Answer"
-            elif selected_option == question["answer"]:
-                self.score += 1
-                result = "Correct"
-            else:
-                result = "Wrong"
+            result = self.answers.record(question, selected_option)
+            STATS.record(self.difficulty, question.text, result, response_time)
+            self.checkpoint()
 
-            summary.append(
-                {
-                    "question": question["question"],
-                    "your_answer": selected_option,
-                    "correct_answer": question["answer"],
-                    "result": result,
-                }
-            )
+        self.score = self.answers.score
 
-        clear_terminal()
-        console.print(
+        self.terminal.clear()
+        self.console.print(
             f"\n[bold green]Quiz Complete![/bold green] "
-            f"You scored {self.score}/{len(self.questions)}."
+            f"You scored {self.score}/{len(self.answers)}."
         )
 
         # Final summary display
         chunk_size = 4
-        for i in range(0, len(summary), chunk_size):
-            clear_terminal()
-            chunk = summary[i: i + chunk_size]
-            console.print("\n[bold cyan]Quiz Summary[/bold cyan]")
-            for idx, item in enumerate(chunk, start=i + 1):
-                console.print(
-                    f"\n[bold yellow]Question {idx}:[/bold yellow] "
-                    f"{item['question']}"
+        total = len(self.answers)
+        for i in range(0, total, chunk_size):
+            self.terminal.clear()
+            self.console.print("\n[bold cyan]Quiz Summary[/bold cyan]")
+            for idx in range(i, min(i + chunk_size, total)):
+                question = self.bank.question(self.answers.question_ids[idx])
+                chosen = self.answers.chosen[idx]
+                result = RESULT_NAMES[self.answers.results[idx]]
+                your_answer = (
+                    question.options[chosen] if chosen >= 0 else "No Answer"
+                )
+                self.console.print(
+                    f"\n[bold yellow]Question {idx + 1}:[/bold yellow] "
+                    f"{question.text}"
                 )
-                console.print(
-                    f"Your Answer: [cyan]{item['your_answer']}[/cyan] | "
-                    f"Correct Answer: [green]{item['correct_answer']}[/green]"
+                self.console.print(
+                    f"Your Answer: [cyan]{your_answer}[/cyan] | "
+                    f"Correct Answer: [green]{question.answer_text}[/green]"
                 )
-                console.print(
-                    f"Result: [bold green]{item['result']}[/bold green]"
-                    if item["result"] == "Correct"
-                    else f"[bold red]{item['result']}[/bold red]"
+                self.console.print(
+                    f"Result: [bold green]{result}[/bold green]"
+                    if result == "Correct"
+                    else f"[bold red]{result}[/bold red]"
                 )
 
             # Show message if more chunks remain
-            if i + chunk_size < len(summary):
-                input("\nPress Enter to see the rest of your results...\n")
+            if i + chunk_size < total:
+                self.terminal.input(
+                    "\nPress Enter to see the rest of your results...\n"
+                )
 
         self.save_results()
+        if self.session:
+            CHECKPOINTS.delete(self.session)
 
     def save_results(self):
-        """Save the user's quiz results to Google Sheets."""
+        """Save the user's quiz results to the score store."""
         try:
             timestamp = datetime.now().strftime("%Y-%m-%d")
-            self.sheet.append_row(
-                [self.name, self.score, timestamp]
-            )  # Save to correct sheet
+            SCORE_QUEUE.submit(
+                self.difficulty, self.name, self.score, timestamp
+            )  # Sent to the correct sheet in the background
+            LEADERBOARD.record(
+                self.difficulty, self.name, self.score, timestamp
+            )
 
-            console.print(
+            self.console.print(
                 "[bold green]Your results have been saved to "
                 "the leaderboard![/bold green]"
             )
         except Exception as e:
-            console.print(f"[red]Failed to save results: {e}[/red]")
+            self.console.print(f"[red]Failed to save results: {e}[/red]")
+            return
+
+        self.show_rank()
+
+    def show_rank(self):
+        """
+        Tell the player where their best stands, if this process has
+        already built the board: reading the scores just for this would
+        keep them waiting on the network after every game.
+        """
+        try:
+            standing = LEADERBOARD.standing(
+                self.difficulty, self.name, self.score
+            )
+            if standing is None:
+                return
+            best, rank, total = standing
+            if best > self.score:
+                self.console.print(
+                    f"[bold cyan]Your best of {best} still ranks {rank:,} "
+                    f"of {total:,} players in {self.difficulty} "
+                    "mode.[/bold cyan]"
+                )
+            else:
+                self.console.print(
+                    f"[bold cyan]Your rank is {rank:,} of {total:,} "
+                    f"players in {self.difficulty} mode.[/bold cyan]"
+                )
+        except Exception as e:
+            self.console.print(f"[red]Failed to fetch your rank: {e}[/red]")
+
+    def choose_window(self):
+        """Ask which period to show; return (title, leaderboard window)."""
+        windows = {
+            "1": ("All Time", None),
+            # Boards hold each player's best, so these list the bests
+            # set in the period rather than every game played in it
+            "2": ("Bests Set Today", "day"),
+            "3": ("Bests Set in the Last 7 Days", "week"),
+            "4": ("Bests Set in the Last 30 Days", "month"),
+        }
+        while True:
+            SCREENS.write(
+                self.terminal,
+                "window menu",
+                lambda console: console.print(
+                    "1. All Time\n2. Bests Set Today\n"
+                    "3. Bests Set in the Last 7 Days\n"
+                    "4. Bests Set in the Last 30 Days"
+                ),
+            )
+            choice = self.terminal.input(
+                "Enter your choice (1/2/3/4):\n"
+            ).strip()
+            if choice in windows:
+                return windows[choice]
+            self.console.print(
+                "[red]Invalid input. Please enter 1, 2, 3, or 4.[/red]"
+            )
+
+    def leaderboard_table(self, title, rows):
+        """Build a leaderboard table from (name, score, date) rows."""
+        from rich.table import Table  # Only needed once a board is shown
+
+        table = Table(title=title, style="cyan")
+        table.add_column(
+            "Name", justify="left", style="bright_magenta", no_wrap=True
+        )
+        table.add_column("Score", justify="center", style="green")
+        table.add_column("Date", justify="left", style="yellow")
+
+        for row in rows:
+            table.add_row(row[0], str(row[1]), row[2])
+
+        return table
 
     def display_leaderboard(self):
         """Allow user to select which leaderboard to view (Easy or Hard)."""
-        clear_terminal()
+        self.terminal.clear()
 
-        # Select the correct sheet based on difficulty mode
-        sheet_name = (
-            "Easy Scores" if self.difficulty == "Easy" else "Hard Scores"
-        )
+        # Select the correct scores based on difficulty mode
+        sheet_name = f"{self.difficulty} Scores"
 
         try:
-            leaderboard_sheet = SHEET.worksheet(sheet_name)
-
-            console.print(
+            self.console.print(
                 f"\n[bold cyan]Showing {sheet_name} Leaderboard[/bold cyan]"
             )
 
-            data = leaderboard_sheet.get_all_values()[
-                1:
-            ]  # Skip the header row
-            if not data:  # Check if leaderboard is empty
-                console.print("[bold red]No scores available yet![/bold red]")
+            title, window = self.choose_window()
+            sorted_data, version = LEADERBOARD.top(
+                self.difficulty, window=window
+            )
+            if not sorted_data:  # Check if leaderboard is empty
+                self.console.print(
+                    "[bold red]No scores available yet![/bold red]"
+                )
                 return
 
-            sorted_data = sorted(data, key=lambda x: int(x[1]), reverse=True)[
-                :10
-            ]
-
-            table = Table(
-                title=f"{self.difficulty} Mode Leaderboard", style="cyan"
+            # Re-rendered only when the board changes (or the day, which
+            # moves the windows)
+            key = (
+                "leaderboard",
+                self.difficulty,
+                window,
+                version,
+                datetime.now().date() if window else None,
             )
-            table.add_column(
-                "Name", justify="left", style="bright_magenta", no_wrap=True
+            SCREENS.write(
+                self.terminal,
+                key,
+                lambda console: console.print(
+                    self.leaderboard_table(
+                        f"{self.difficulty} Mode Leaderboard - {title}",
+                        sorted_data,
+                    )
+                ),
             )
-            table.add_column("Score", justify="center", style="green")
-            table.add_column("Date", justify="left", style="yellow")
-
-            for row in sorted_data:
-                table.add_row(row[0], row[1], row[2])
-
-            console.print(table)
         except Exception as e:
-            console.print(f"[red]Failed to fetch leaderboard: {e}[/red]")
+            self.console.print(f"[red]Failed to fetch leaderboard: {e}[/red]")
+            return
+        self.show_rank()  # The board is built now
 
 
 def main():
     """Main function to handle the program execution."""
-    title_screen()  # Display the title and welcome message
+    global START_TIME
+    # Pooled workers are started by controllers/default.js before anyone
+    # connects, and wait here with everything imported and authenticated
+    # until the launcher sends SIGUSR1 to hand them a player.
+    warm_worker = bool(os.environ.get("QUIZ_WARM_WORKER"))
+    if warm_worker:
+        # Blocked before any thread starts so an early signal stays pending
+        signal.pthread_sigmask(signal.SIG_BLOCK, {signal.SIGUSR1})
+    metrics.start_reporter()  # No-op unless QUIZ_METRICS is set
+    STORE.start()  # Authenticate while the title screen is shown
+    SCORE_QUEUE.start()  # Resend scores spooled by killed processes
+    STATS.start()  # Flushes periodically and at exit
+    CHECKPOINTS.sweep()  # Games abandoned long enough ago to expire
+    # The browser's session token, used to resume an unfinished game
+    session = os.environ.get("QUIZ_SESSION")
+    if warm_worker:
+        # Tell the launcher it may hand us a player now that SIGUSR1
+        # is blocked; a terminal ignores the sequence if it leaks out
+        os.write(1, WARM_READY)
+        signal.sigwait({signal.SIGUSR1})
+        START_TIME = time.perf_counter()
+        session = CHECKPOINTS.take_handoff(os.getpid())
+    play(Terminal(), session)
+    SCORE_QUEUE.close()  # Give queued scores a chance to send
+
+
+def play(terminal, session=None):
+    """Run one player's session on the given terminal until they exit."""
+    try:
+        _play(terminal, session)
+    finally:
+        terminal.flush()  # Send whatever the last screen left buffered
+
+
+def resume_game(terminal, session):
+    """Return the session's unfinished Quiz, ready to continue, or None."""
+    state = CHECKPOINTS.load(session) if session else None
+    if state is None:
+        return None
+    quiz = Quiz(terminal, session)
+    if not quiz.resume(state):
+        return None
+    terminal.clear()
+    terminal.console.print(
+        f"[green]Welcome back, {quiz.name}! Your {quiz.difficulty} Mode "
+        f"game continues at question {len(quiz.answers.chosen) + 1}."
+        "[/green]\n"
+    )
+    terminal.input("Press Enter to continue...\n")
+    return quiz
+
+
+def _play(terminal, session=None):
+    """The menu loop behind play()."""
+    quiz = resume_game(terminal, session)
+    if quiz is None:
+        title_screen(terminal)  # Display the title and welcome message
 
     while True:
-        quiz = Quiz()
-        quiz.get_user_info()
-        quiz.load_questions()
+        if quiz is None:
+            quiz = Quiz(terminal, session)
+            quiz.get_user_info()
+            quiz.load_questions()
         quiz.run_quiz()
 
         while True:
-            console.print(
-                "\n[bold cyan]What would you like to do next?[/bold cyan]"
+            SCREENS.write(
+                terminal,
+                "next menu",
+                lambda console: console.print(
+                    "\n[bold cyan]What would you like to do next?"
+                    "[/bold cyan]\n1. Play Again\n2. View Leaderboard\n3. Exit"
+                ),
             )
-            console.print("1. Play Again\n2. View Leaderboard\n3. Exit")
-            choice = input("Enter your choice (1/2/3):\n").strip()
+            choice = terminal.input("Enter your choice (1/2/3):\n").strip()
 
             if choice == "1":  # Play again
-                clear_terminal()
+                terminal.clear()
+                quiz = None
                 break  # Exit inner loop and restart the quiz
             elif choice == "2":  # View leaderboard
-                clear_terminal()
+                terminal.clear()
                 quiz.display_leaderboard()
                 # Stay in the loop for further options after leaderboard
             elif choice == "3":  # Exit
-                console.print(
+                terminal.console.print(
                     "[bold green]Thank you for playing! Goodbye![/bold green]"
                 )
                 return  # Exit the program entirely
             else:  # Invalid input
-                console.print(
+                terminal.console.print(
                     "[red]Invalid input. Please enter 1, 2, or 3.[/red]"
                 )
                 # Re-prompt without exiting the loop
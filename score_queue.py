@@ -0,0 +1,187 @@
+import json
+import os
+import random
+import threading
+import time
+import uuid
+
+
+class ScoreQueue:
+    """
+    Write-behind queue in front of a ScoreStore.
+
+    submit() only appends the row to a local spool file and returns, so
+    the player never waits on the network. A background thread sends
+    queued rows in batches through store.save_best_scores() and retries
+    failures with exponential backoff.
+
+    Every process spools to its own file. Files left behind by a
+    process that was killed are picked up by the next one to start.
+    Delivery is at-least-once: a process killed between a successful
+    send and the spool rewrite will send those rows again, which only
+    keeping each player's best makes harmless.
+    """
+
+    def __init__(
+        self,
+        store,
+        spool_dir=".score_spool",
+        batch_size=50,
+        flush_interval=1.0,
+        max_backoff=60.0,
+    ):
+        self.store = store
+        self.spool_dir = spool_dir
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_backoff = max_backoff
+        self.spool_path = os.path.join(
+            spool_dir, f"{os.getpid()}-{uuid.uuid4().hex[:8]}.jsonl"
+        )
+        self._pending = []  # [difficulty, name, score, date] lists
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def start(self):
+        """Recover orphaned spool files and start the sender thread."""
+        with self._cond:
+            if self._thread is not None:
+                return self
+            os.makedirs(self.spool_dir, exist_ok=True)
+            claimed = claim_orphans(self.spool_dir, self.spool_path)
+            for _, rows in claimed:
+                self._pending.extend(rows)
+            if self._pending:
+                self._rewrite_spool()
+            for path, _ in claimed:
+                os.remove(path)  # Only once the rows are in our spool
+            self._thread = threading.Thread(
+                target=self._run, name="score-queue", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def _rewrite_spool(self):
+        """Replace the spool file with the rows still pending."""
+        tmp = self.spool_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as spool:
+            for row in self._pending:
+                spool.write(json.dumps(row) + "\n")
+        os.replace(tmp, self.spool_path)
+
+    def submit(self, difficulty, name, score, date):
+        """Queue a finished game; it is safe on disk once this returns."""
+        row = [difficulty, name, score, date]
+        self.start()
+        with self._cond:
+            with open(self.spool_path, "a", encoding="utf-8") as spool:
+                spool.write(json.dumps(row) + "\n")
+            self._pending.append(row)
+            self._cond.notify()
+
+    def _run(self):
+        backoff = 0
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                batch = self._pending[: self.batch_size]
+            try:
+                self._send(batch)
+            except Exception:
+                backoff = min(max(backoff * 2, 1.0), self.max_backoff)
+                # Jitter so many processes don't retry in lockstep
+                time.sleep(backoff * random.uniform(0.5, 1.0))
+                continue
+            backoff = 0
+            if len(self._pending) < self.batch_size:
+                # Give other finished games a moment to join the batch
+                time.sleep(self.flush_interval)
+
+    def _send(self, batch):
+        """
+        Send a batch with one write per difficulty, dropping each group
+        from the spool as soon as it has been stored.
+        """
+        by_difficulty = {}
+        for row in batch:
+            by_difficulty.setdefault(row[0], []).append(row)
+        for difficulty, group in by_difficulty.items():
+            self.store.save_best_scores(
+                difficulty, [tuple(row[1:]) for row in group]
+            )
+            sent = set(map(id, group))
+            with self._cond:
+                self._pending = [
+                    row for row in self._pending if id(row) not in sent
+                ]
+                self._rewrite_spool()
+                self._cond.notify_all()
+
+    def flush(self, timeout=None):
+        """Wait until every queued row is sent; return True on success."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._pending:
+                remaining = (
+                    None if deadline is None else deadline - time.monotonic()
+                )
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def close(self, timeout=5):
+        """Try to send what is left and tidy up an empty spool file."""
+        if self._thread is not None and self.flush(timeout):
+            with self._cond:
+                if not self._pending and os.path.exists(self.spool_path):
+                    os.remove(self.spool_path)
+
+
+def claim_orphans(spool_dir, spool_path):
+    """
+    Claim the spool files in `spool_dir` left behind by processes that
+    have exited, other than our own `spool_path`.
+
+    Return [(claimed path, rows)], rows being the JSON lines each file
+    held. Remove a claimed file once its rows are safe in our spool.
+    """
+    claimed = []
+    for entry in os.listdir(spool_dir):
+        path = os.path.join(spool_dir, entry)
+        if not entry.endswith(".jsonl") or path == spool_path:
+            continue
+        if _pid_alive(entry.split("-", 1)[0]):
+            continue
+        # Renamed to a name of our own first, so two starting processes
+        # can't both claim it, and so it is recovered again if this
+        # process dies before the rows are in its spool
+        target = os.path.join(
+            spool_dir,
+            f"{os.getpid()}-claimed-{entry.split('-claimed-')[-1]}",
+        )
+        try:
+            os.rename(path, target)
+        except OSError:
+            continue
+        rows = []
+        with open(target, encoding="utf-8") as spool:
+            for line in spool:
+                try:
+                    rows.append(json.loads(line))
+                except ValueError:
+                    pass  # Torn write from a killed process
+        claimed.append((target, rows))
+    return claimed
+
+
+def _pid_alive(pid):
+    """Return True if `pid` names a running process."""
+    try:
+        os.kill(int(pid), 0)
+    except (ValueError, ProcessLookupError):
+        return False
+    except PermissionError:
+        return True
+    return True
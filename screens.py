@@ -0,0 +1,79 @@
+"""
+Rendered output for screens that rarely change.
+
+The title banner is rendered with pyfiglet once, at build time, into
+title_banner.txt:
+
+    python3 screens.py
+
+Everything else is rendered through rich the first time it is shown and
+kept as the finished ANSI string, so showing it again is one buffered
+write with no rich or pyfiglet work.
+"""
+import os
+import threading
+from collections import OrderedDict
+
+BANNER_FILE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "title_banner.txt"
+)
+
+
+def render_banner():
+    """Render the "TRAVEL QUIZ" banner with pyfiglet."""
+    from pyfiglet import Figlet
+
+    return Figlet(font="big", width=80).renderText("TRAVEL QUIZ")
+
+
+def load_banner():
+    """Return the pre-rendered banner, rendering it if the file is gone."""
+    try:
+        with open(BANNER_FILE, encoding="utf-8") as banner:
+            return banner.read()
+    except OSError:
+        return render_banner()
+
+
+class ScreenCache:
+    """
+    Rendered screens, keyed by name and by the console's output settings.
+
+    `draw` is called with a rich Console and only runs on a miss; what
+    it prints is captured and reused for every later session with the
+    same colour system and width. Keys for changing content, such as a
+    leaderboard, should include a version so stale renders are unused
+    and eventually evicted.
+    """
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self._screens = OrderedDict()
+        self._lock = threading.Lock()
+
+    def render(self, console, key, draw):
+        """Return the rendered text for `key`, drawing it on a miss."""
+        full_key = (key, console.color_system, console.width)
+        with self._lock:
+            text = self._screens.get(full_key)
+            if text is not None:
+                self._screens.move_to_end(full_key)
+                return text
+        with console.capture() as capture:
+            draw(console)
+        text = capture.get()
+        with self._lock:
+            self._screens[full_key] = text
+            if len(self._screens) > self.maxsize:
+                self._screens.popitem(last=False)
+        return text
+
+    def write(self, terminal, key, draw):
+        """Queue the rendered screen for `key` on a Terminal."""
+        terminal.write(self.render(terminal.console, key, draw))
+
+
+if __name__ == "__main__":
+    with open(BANNER_FILE, "w", encoding="utf-8") as banner:
+        banner.write(render_banner())
+    print(f"Wrote {BANNER_FILE}")
@@ -0,0 +1,211 @@
+"""
+Multi-session quiz server.
+
+Hosts many players in one long-lived process instead of spawning
+`python3 run.py` per websocket connection. Every TCP connection speaks
+the same raw terminal byte stream a pty would, so controllers/default.js
+can pipe websocket frames straight through (see QUIZ_SERVER there).
+All sessions share one score store, leaderboard cache and score queue.
+
+Run with:  python3 server.py --port 8001
+"""
+import argparse
+import asyncio
+import codecs
+import queue
+import threading
+import time
+
+import metrics
+import run
+from terminal import Terminal
+
+SESSION_HEADER = b"QUIZ-SESSION "
+SESSION_HEADER_WAIT = 0.05  # Seconds
+
+
+class SessionTerminal(Terminal):
+    """
+    A Terminal backed by one network connection.
+
+    Without a pty in between, this also does the line discipline the
+    kernel would: echo, backspace, CR to newline, and LF to CRLF.
+    """
+
+    def __init__(self, loop, writer):
+        self.loop = loop
+        self.writer = writer
+        self._lines = queue.Queue()
+        self._line = []
+        self._decoder = codecs.getincrementaldecoder("utf-8")("replace")
+        self._in_escape = False
+        super().__init__(
+            force_terminal=True, color_system="standard", width=80, height=24
+        )
+
+    def isatty(self):
+        return True
+
+    def _emit(self, text):
+        data = text.replace("\n", "\r\n").encode("utf-8")
+        self.loop.call_soon_threadsafe(self._write_bytes, data)
+
+    def _write_bytes(self, data):
+        if not self.writer.is_closing():
+            self.writer.write(data)
+
+    def _read_line(self, deadline):
+        timeout = None
+        if deadline is not None:
+            timeout = max(0, deadline - time.monotonic())
+        try:
+            line = self._lines.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        if line is None:
+            self._lines.put(None)  # Keep every later read failing too
+            raise EOFError
+        return line
+
+    def discard_input(self):
+        # Drop whole lines typed ahead, like tcflush, but keep the
+        # end-of-input marker so later reads still fail
+        hung_up = False
+        while True:
+            try:
+                hung_up |= self._lines.get_nowait() is None
+            except queue.Empty:
+                break
+        if hung_up:
+            self._lines.put(None)
+        # The half-typed line belongs to the event loop thread
+        self.loop.call_soon_threadsafe(self._clear_line)
+
+    def _clear_line(self):
+        self._line = []
+
+    def feed(self, data):
+        """Handle bytes typed by the player (called on the event loop)."""
+        echo = []
+        for char in self._decoder.decode(data):
+            if self._in_escape:
+                # Drop arrow keys and other escape sequences
+                self._in_escape = not char.isalpha() and char != "~"
+            elif char == "\x1b":
+                self._in_escape = True
+            elif char in "\r\n":
+                echo.append("\r\n")
+                self._lines.put("".join(self._line))
+                self._line = []
+            elif char in "\x7f\b":
+                if self._line:
+                    self._line.pop()
+                    echo.append("\b \b")
+            elif char.isprintable():
+                self._line.append(char)
+                echo.append(char)
+        if echo:
+            self.writer.write("".join(echo).encode("utf-8"))
+
+    def hang_up(self):
+        """Wake up any pending input() once the connection has gone."""
+        self._lines.put(None)
+
+
+async def read_session_header(reader):
+    """
+    Return (token, first bytes) for a new connection.
+
+    The launcher starts each connection with "QUIZ-SESSION <token>\n" so
+    a reconnecting player resumes their game. Other clients send nothing
+    first, which costs them a short wait before the title screen.
+    """
+    try:
+        data = await asyncio.wait_for(reader.read(4096), SESSION_HEADER_WAIT)
+    except asyncio.TimeoutError:
+        return None, b""
+    if not data.startswith(SESSION_HEADER):
+        return None, data
+    line, _, rest = data.partition(b"\n")
+    token = line[len(SESSION_HEADER):].decode("ascii", "replace").strip()
+    return token or None, rest
+
+
+async def handle_connection(reader, writer):
+    """Serve one player for the lifetime of their connection."""
+    loop = asyncio.get_running_loop()
+    terminal = SessionTerminal(loop, writer)
+    finished = loop.create_future()
+    token, first = await read_session_header(reader)
+    if first:
+        terminal.feed(first)
+
+    def session():
+        try:
+            run.play(terminal, token)
+        except EOFError:
+            pass  # Player disconnected
+        finally:
+            loop.call_soon_threadsafe(finished.set_result, None)
+
+    # The quiz itself is blocking code, so it runs on its own thread
+    # while this coroutine shuttles bytes.
+    threading.Thread(target=session, name="quiz-session", daemon=True).start()
+    reading = asyncio.ensure_future(reader.read(4096))
+    try:
+        while True:
+            done, _ = await asyncio.wait(
+                {reading, finished}, return_when=asyncio.FIRST_COMPLETED
+            )
+            if finished in done:
+                break
+            data = reading.result()
+            if not data:
+                break
+            terminal.feed(data)
+            reading = asyncio.ensure_future(reader.read(4096))
+    finally:
+        reading.cancel()
+        terminal.hang_up()
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+        writer.close()
+
+
+async def sweep_checkpoints():
+    while True:
+        await asyncio.to_thread(run.CHECKPOINTS.sweep)
+        await asyncio.sleep(run.CHECKPOINTS.ttl)
+
+
+async def serve(host, port):
+    metrics.start_reporter()
+    run.STORE.start()
+    run.SCORE_QUEUE.start()
+    run.STATS.start()
+    # This process outlives many games, so expired checkpoints are
+    # swept again every `ttl` rather than only at startup
+    sweeper = asyncio.ensure_future(sweep_checkpoints())
+    server = await asyncio.start_server(handle_connection, host, port)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        sweeper.cancel()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port))
+    finally:
+        run.SCORE_QUEUE.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,390 @@
+import contextlib
+import heapq
+import itertools
+import os
+import threading
+import time
+from concurrent.futures import Future
+
+import metrics
+
+SCOPE = [
+    "https://www.googleapis.com/auth/spreadsheets",
+    "https://www.googleapis.com/auth/drive.file",
+    "https://www.googleapis.com/auth/drive",
+]
+
+# Request priorities: queued writes are sent before queued reads
+WRITE, READ = 0, 1
+
+# Seconds before a failed connection is retried, doubling per failure
+RECONNECT_BACKOFF = (1.0, 60.0)
+
+# Access tokens are renewed this many seconds before they expire, so no
+# API call ever waits for one
+REFRESH_MARGIN = 300
+
+
+def is_quota_error(error):
+    """True for an HTTP 429 from the Sheets API (gspread's APIError)."""
+    response = getattr(error, "response", None)
+    return getattr(response, "status_code", None) == 429
+
+
+def is_grid_error(error):
+    """
+    True for the HTTP 400 the Sheets API returns for a range starting
+    below the last row of the worksheet, rather than no values.
+    """
+    response = getattr(error, "response", None)
+    return (
+        getattr(response, "status_code", None) == 400
+        and "exceeds grid limits" in str(error)
+    )
+
+
+class SheetsUnavailable(ConnectionError):
+    """Raised while waiting to retry a failed connection."""
+
+
+class TokenBucket:
+    """Refilled at `rate` tokens per minute, holding at most `burst`."""
+
+    def __init__(self, rate=60, burst=10):
+        self.rate = rate / 60.0
+        self.burst = burst
+        self._state = (float(burst), time.time())
+
+    @contextlib.contextmanager
+    def _locked(self):
+        yield None  # Callers already serialise access within a process
+
+    def _load(self, handle):
+        return self._state
+
+    def _store(self, handle, state):
+        self._state = state
+
+    def take(self):
+        """Take a token, or return how many seconds until one is due."""
+        with self._locked() as handle:
+            tokens, updated = self._load(handle)
+            now = time.time()
+            tokens = min(
+                self.burst, tokens + max(now - updated, 0) * self.rate
+            )
+            wait = 0 if tokens >= 1 else (1 - tokens) / self.rate
+            self._store(handle, (tokens - 1 if not wait else tokens, now))
+            return wait
+
+    def drain(self):
+        """Empty the bucket, e.g. after the API refused a request."""
+        with self._locked() as handle:
+            self._store(handle, (0.0, time.time()))
+
+
+class SharedTokenBucket(TokenBucket):
+    """
+    A TokenBucket kept in a small file, so every process using the same
+    `path` on a host draws from one budget. The file is locked with
+    flock for each read-update-write.
+    """
+
+    def __init__(self, path, rate=60, burst=10):
+        super().__init__(rate, burst)
+        self.path = path
+
+    @contextlib.contextmanager
+    def _locked(self):
+        import fcntl
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "a+", encoding="ascii") as handle:
+            fcntl.flock(handle, fcntl.LOCK_EX)  # Released on close
+            yield handle
+
+    def _load(self, handle):
+        handle.seek(0)
+        try:
+            tokens, updated = map(float, handle.read().split())
+        except ValueError:  # New or torn file: start full
+            return float(self.burst), time.time()
+        return tokens, updated
+
+    def _store(self, handle, state):
+        handle.seek(0)
+        handle.truncate()
+        handle.write("%r %r" % state)
+        handle.flush()
+
+
+class RequestScheduler:
+    """
+    One queue for every Google Sheets request a process makes.
+
+    Requests run one at a time on a dispatcher thread. Each takes a
+    token from `bucket`, by default a TokenBucket refilled at `rate`
+    requests per minute and holding at most `burst`; a rate of 0
+    disables the limit. Pass a SharedTokenBucket to share one budget
+    with other processes. Writes are sent ahead of waiting reads, and a
+    read with the same `key` as one already queued or in flight waits
+    for that call instead of making its own. A request refused for
+    quota empties the bucket and is retried up to `retries` times.
+    """
+
+    def __init__(self, rate=60, burst=10, retries=3, bucket=None):
+        if bucket is None and rate:
+            bucket = TokenBucket(rate, burst)
+        self.bucket = bucket
+        self.retries = retries
+        self._queue = []
+        self._shared = {}
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def call(self, fn, *args, priority=READ, key=None, **kwargs):
+        """Run fn(*args, **kwargs) through the queue and return its result."""
+        with self._cond:
+            future = self._shared.get(key) if key is not None else None
+            if future is None:
+                future = Future()
+                if key is not None:
+                    self._shared[key] = future
+                heapq.heappush(
+                    self._queue,
+                    (priority, next(self._seq), 0, future, fn, args, kwargs),
+                )
+                if self._thread is None:
+                    self._thread = threading.Thread(
+                        target=self._run, name="sheets-requests", daemon=True
+                    )
+                    self._thread.start()
+                self._cond.notify()
+            elif metrics.ENABLED:
+                metrics.observe("sheets.coalesced", 0)
+        return future.result()
+
+    def _wait_for_token(self):
+        """Take a token, or return how many seconds until one is due."""
+        return self.bucket.take() if self.bucket else 0
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._queue:
+                    self._cond.wait()
+                wait = self._wait_for_token()
+                if wait:
+                    # Woken early if something more urgent is queued
+                    self._cond.wait(wait)
+                    continue
+                request = heapq.heappop(self._queue)
+            priority, seq, attempts, future, fn, args, kwargs = request
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                with self._cond:
+                    if is_quota_error(e) and attempts < self.retries:
+                        if self.bucket:
+                            self.bucket.drain()
+                        heapq.heappush(
+                            self._queue,
+                            (priority, seq, attempts + 1, future, fn, args,
+                             kwargs),
+                        )
+                        continue
+                    self._finish(future)
+                future.set_exception(e)
+            else:
+                with self._cond:
+                    self._finish(future)
+                future.set_result(result)
+
+    def _finish(self, future):
+        """Stop sharing a finished call with new requests."""
+        for key, shared in list(self._shared.items()):
+            if shared is future:
+                del self._shared[key]
+
+
+class SheetsConnection:
+    """
+    Lazily opened connection to the QuizScores spreadsheet.
+
+    Authentication and the worksheet lookups run on a background
+    thread as soon as start() is called, so the title screen can be
+    drawn while the network round trips are in flight. Callers only
+    block when they actually need a worksheet. The lookups count
+    against the quota, so they go through `scheduler` when given one.
+
+    Every request shares one keep-alive HTTP session, and the handles
+    for all worksheets come from a single metadata request and are
+    reused for the life of the process. A background thread renews the
+    access token REFRESH_MARGIN seconds before it expires.
+
+    A failed connection is not final: the next call after a backoff
+    (RECONNECT_BACKOFF) starts a new attempt, so a long-lived process
+    recovers from a startup outage.
+    """
+
+    def __init__(
+        self,
+        spreadsheet="QuizScores",
+        worksheets=("Easy Scores", "Hard Scores"),
+        creds_file="creds.json",
+        scheduler=None,
+    ):
+        self.spreadsheet_name = spreadsheet
+        self.worksheet_names = worksheets
+        self.creds_file = creds_file
+        self.scheduler = scheduler or RequestScheduler(rate=0)
+        self.sheet = None
+        self.credentials = None
+        self._worksheets = {}
+        self._error = None  # The last failure, raised while backing off
+        self._attempt = None  # (thread, failures) of the current attempt
+        self._connected = False
+        self._backoff = RECONNECT_BACKOFF[0]
+        self._retry_at = 0.0
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Begin connecting in the background (safe to call repeatedly)."""
+        with self._lock:
+            if (
+                self._attempt is None
+                and not self._connected
+                and time.monotonic() >= self._retry_at
+            ):
+                failures = []
+                thread = threading.Thread(
+                    target=self._connect,
+                    args=(failures,),
+                    name="sheets-connect",
+                    daemon=True,
+                )
+                self._attempt = (thread, failures)
+                thread.start()
+        return self
+
+    def _connect(self, failures):
+        """Authorize and open every worksheet we use."""
+        try:
+            # Imported here so the cost is paid off the main thread
+            import gspread
+            from google.auth.transport.requests import (
+                AuthorizedSession,
+                Request,
+            )
+            from google.oauth2.service_account import Credentials
+
+            with metrics.timed("sheets.auth"):
+                self.credentials = Credentials.from_service_account_file(
+                    self.creds_file, scopes=SCOPE
+                )
+                token_request = Request()
+                self.credentials.refresh(token_request)
+                client = gspread.Client(
+                    None, session=AuthorizedSession(self.credentials)
+                )
+            with metrics.timed("sheets.open"):
+                self.sheet = self.scheduler.call(
+                    client.open, self.spreadsheet_name
+                )
+                handles = {
+                    worksheet.title: worksheet
+                    for worksheet in self.scheduler.call(self.sheet.worksheets)
+                }
+            for name in self.worksheet_names:
+                if name not in handles:
+                    raise gspread.WorksheetNotFound(name)
+            self._worksheets.update(handles)
+            threading.Thread(
+                target=self._keep_token_fresh,
+                args=(token_request,),
+                name="sheets-token",
+                daemon=True,
+            ).start()
+        except Exception as e:
+            failures.append(e)
+
+    def _keep_token_fresh(self, token_request):
+        """Renew the access token shortly before each expiry."""
+        import datetime
+
+        while True:
+            expiry = self.credentials.expiry  # Naive UTC
+            if expiry is None:
+                return
+            now = datetime.datetime.now(datetime.timezone.utc)
+            remaining = (expiry - now.replace(tzinfo=None)).total_seconds()
+            time.sleep(max(remaining - REFRESH_MARGIN, 0))
+            try:
+                with metrics.timed("sheets.token_refresh"):
+                    self.credentials.refresh(token_request)
+            except Exception:
+                # The session still refreshes on demand; try again soon
+                time.sleep(30)
+
+    def wait(self):
+        """Block until the connection is ready, re-raising any failure."""
+        self.start()
+        with self._lock:
+            attempt = self._attempt
+            if attempt is None:
+                if self._connected:
+                    return self
+                # Backing off after a failure. A new exception each
+                # time: re-raising the stored one would grow its
+                # traceback, and pin every caller's frames, on each call
+                raise SheetsUnavailable(
+                    f"Google Sheets is unavailable: {self._error}"
+                ) from self._error
+        thread, failures = attempt
+        thread.join()
+        with self._lock:
+            if self._attempt is attempt:
+                self._attempt = None
+                if failures:
+                    self._error = failures[0]
+                    self._retry_at = time.monotonic() + self._backoff
+                    self._backoff = min(
+                        self._backoff * 2, RECONNECT_BACKOFF[1]
+                    )
+                else:
+                    self._connected = True
+                    self._backoff = RECONNECT_BACKOFF[0]
+        if failures:
+            raise failures[0]
+        return self
+
+    def worksheet(self, name):
+        """Return an already opened worksheet, waiting if necessary."""
+        self.wait()
+        return self._worksheets[name]
+
+    def add_worksheet(self, name, header):
+        """Create a worksheet holding just a header row, unless it exists."""
+        self.wait()
+        with self._lock:
+            if name not in self._worksheets:
+                try:
+                    worksheet = self.scheduler.call(
+                        self.sheet.add_worksheet,
+                        name,
+                        rows=1,
+                        cols=len(header),
+                        priority=WRITE,
+                    )
+                except Exception:
+                    # Another process may have just added it
+                    worksheet = self.scheduler.call(
+                        self.sheet.worksheet, name
+                    )
+                else:
+                    self.scheduler.call(
+                        worksheet.append_row, header, priority=WRITE
+                    )
+                self._worksheets[name] = worksheet
+            return self._worksheets[name]
@@ -0,0 +1,614 @@
+import itertools
+import os
+import threading
+
+import metrics
+from sheets import (
+    READ,
+    WRITE,
+    RequestScheduler,
+    SharedTokenBucket,
+    SheetsConnection,
+    is_grid_error,
+)
+
+# Worksheet holding the scores for each difficulty mode
+WORKSHEETS = {"Easy": "Easy Scores", "Hard": "Hard Scores"}
+# Per-question answer counts, added up on read; created when needed
+STATS_WORKSHEET = "Question Stats"
+STATS_HEADER = [
+    "Difficulty", "Question", "Correct", "Wrong", "Timeouts",
+    "Total ms", "Max ms", "Buckets",
+]
+
+
+class ScoreStore:
+    """
+    Interface for the place quiz scores are kept.
+
+    Rows are returned as (name, score, date) tuples with an int score.
+    """
+
+    def start(self):
+        """Begin any slow setup (connections, schema) ahead of time."""
+        return self
+
+    def append_score(self, difficulty, name, score, date):
+        """Record a single finished game."""
+        raise NotImplementedError
+
+    def append_scores(self, difficulty, rows):
+        """Record several (name, score, date) rows in one go."""
+        for name, score, date in rows:
+            self.append_score(difficulty, name, score, date)
+
+    def save_best_scores(self, difficulty, rows):
+        """
+        Keep each player's best (name, score, date) row.
+
+        A player's row is written only if they have none yet or the new
+        score beats it, and is then updated in place rather than added.
+        Sending the same rows twice changes nothing.
+        """
+        raise NotImplementedError
+
+    def top_scores(self, difficulty, limit=10):
+        """Return the best `limit` rows for a difficulty, best first."""
+        raise NotImplementedError
+
+    def rows_since(self, difficulty, cursor=None):
+        """
+        Return (rows, cursor) for rows stored after `cursor`.
+
+        Pass None to read everything. The returned cursor is opaque and
+        is handed back on the next call to fetch only newer rows.
+        """
+        raise NotImplementedError
+
+    def iter_pages(self, difficulty, page_size=5000):
+        """Yield every row in storage order, as lists of about page_size."""
+        rows, _ = self.rows_since(difficulty)
+        for start in range(0, len(rows), page_size):
+            yield rows[start:start + page_size]
+
+    def replace_scores(self, difficulty, rows):
+        """Replace every stored row for a difficulty with `rows`."""
+        raise NotImplementedError
+
+    def add_question_stats(self, rows):
+        """
+        Add per-question answer counts to the stored totals.
+
+        Rows are (difficulty, question, correct, wrong, timeouts,
+        total_ms, max_ms, buckets), buckets being the response-time
+        histogram counts, as built by question_stats.QuestionCounter.
+        """
+        raise NotImplementedError
+
+    def question_stats(self):
+        """Return the stored totals, one row per question, as above."""
+        raise NotImplementedError
+
+    def compact_question_stats(self):
+        """Fold stored stats down to one row per question, if need be."""
+
+
+class SheetsScoreStore(ScoreStore):
+    """
+    Scores kept in the "Easy Scores"/"Hard Scores" Google worksheets.
+
+    Every API request goes through a RequestScheduler. By default it
+    draws on a budget shared by every quiz process on the host, so the
+    one-process-per-player launcher stays under the per-minute quota
+    as a whole.
+    """
+
+    def __init__(self, connection=None, scheduler=None):
+        self.scheduler = scheduler or default_scheduler()
+        self.connection = connection or SheetsConnection(
+            "QuizScores", tuple(WORKSHEETS.values()), scheduler=self.scheduler
+        )
+        # Per difficulty: {name: (row number, score)} of each player's
+        # best row, and how many data rows have been read into it
+        self._best = {}
+        self._best_cursor = {}
+        self._best_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+
+    def start(self):
+        self.connection.start()
+        return self
+
+    def worksheet(self, difficulty):
+        """Return the worksheet for a difficulty, waiting for auth."""
+        return self.connection.worksheet(WORKSHEETS[difficulty])
+
+    def _request(self, priority, name, fn, *args, key=None, **kwargs):
+        """Make one API call through the scheduler, timed as `name`."""
+
+        def timed():
+            with metrics.timed(name):
+                return fn(*args, **kwargs)
+
+        return self.scheduler.call(timed, priority=priority, key=key)
+
+    def _read(self, difficulty, method, *args):
+        """A read; identical reads waiting at the same time share a call."""
+        worksheet = self.worksheet(difficulty)
+        return self._request(
+            READ,
+            f"sheets.{method}",
+            getattr(worksheet, method),
+            *args,
+            key=(difficulty, method, repr(args)),
+        )
+
+    def _read_rows(self, difficulty, method, *args):
+        """
+        A _read() of ranges that may start past the end of the sheet;
+        returns None for those instead of raising.
+        """
+        try:
+            return self._read(difficulty, method, *args)
+        except Exception as e:
+            if is_grid_error(e):
+                return None
+            raise
+
+    def append_score(self, difficulty, name, score, date):
+        worksheet = self.worksheet(difficulty)
+        self._request(
+            WRITE, "sheets.append_row", worksheet.append_row,
+            [name, score, date],
+        )
+
+    def append_scores(self, difficulty, rows):
+        worksheet = self.worksheet(difficulty)
+        self._request(
+            WRITE, "sheets.append_rows", worksheet.append_rows,
+            [list(row) for row in rows],
+        )
+
+    def _catch_up(self, difficulty, worksheet, full=False):
+        """Read rows added since the last call into the best-row index."""
+        if full or difficulty not in self._best:
+            self._best[difficulty] = {}
+            self._best_cursor[difficulty] = 0
+        best = self._best[difficulty]
+        cursor = self._best_cursor[difficulty]
+        data = self._read_rows(difficulty, "get", f"A{cursor + 2}:B") or []
+        for offset, row in enumerate(data):
+            if len(row) < 2:
+                continue
+            name, score = row[0], int(row[1])
+            if name not in best or score > best[name][1]:
+                best[name] = (cursor + 2 + offset, score)
+        self._best_cursor[difficulty] = cursor + len(data)
+        return best
+
+    def save_best_scores(self, difficulty, rows):
+        worksheet = self.worksheet(difficulty)
+        rows = best_rows(rows)
+        with self._best_lock:
+            best = self._catch_up(difficulty, worksheet)
+            updates, appends = self._plan(best, rows)
+            if updates:
+                # Row numbers change when the sheet is compacted, and
+                # other processes raise scores in place without our
+                # index seeing it: check the rows we are about to
+                # overwrite still hold the same players, then re-plan
+                # against the scores they hold now.
+                stored = self._current_rows(difficulty, updates)
+                if stored is None:
+                    best = self._catch_up(difficulty, worksheet, full=True)
+                    updates, appends = self._plan(best, rows)
+                    stored = self._current_rows(difficulty, updates) or []
+                for score, (row, name, *_) in zip(stored, updates):
+                    best[name] = (row, score)
+                updates, appends = self._plan(best, rows)
+            if updates:
+                self._request(
+                    WRITE,
+                    "sheets.batch_update",
+                    worksheet.batch_update,
+                    [
+                        {
+                            "range": f"A{row}:C{row}",
+                            "values": [[name, score, date]],
+                        }
+                        for row, name, score, date in updates
+                    ],
+                )
+                for row, name, score, _ in updates:
+                    best[name] = (row, score)
+            if appends:
+                # Indexed by the next catch-up, which reads on from the
+                # old end of the sheet
+                self._request(
+                    WRITE, "sheets.append_rows", worksheet.append_rows, appends
+                )
+
+    def _current_rows(self, difficulty, updates):
+        """
+        Return the score stored in each (row, name, ...) update's row,
+        or None if any of those rows now holds a different player.
+        """
+        if not updates:
+            return []
+        found = self._read_rows(
+            difficulty,
+            "batch_get",
+            [f"A{row}:B{row}" for row, *_ in updates],
+        )
+        if found is None:
+            return None  # Some of the rows are gone
+        scores = []
+        for values, (_, name, *_) in zip(found, updates):
+            if not values or len(values[0]) < 2 or values[0][0] != name:
+                return None
+            scores.append(int(values[0][1]))
+        return scores
+
+    @staticmethod
+    def _plan(best, rows):
+        """Split rows into in-place (row, ...) updates and new rows."""
+        updates, appends = [], []
+        for name, score, date in rows:
+            if name not in best:
+                appends.append([name, score, date])
+            elif score > best[name][1]:
+                updates.append((best[name][0], name, score, date))
+        return updates, appends
+
+    def top_scores(self, difficulty, limit=10):
+        data = self._read(difficulty, "get_all_values")[1:]  # No header
+        rows = [(row[0], int(row[1]), row[2]) for row in data]
+        return sorted(rows, key=lambda row: row[1], reverse=True)[:limit]
+
+    def rows_since(self, difficulty, cursor=None):
+        # The cursor is the number of data rows already read; row 1 is
+        # the header, so the first unread row is cursor + 2.
+        cursor = cursor or 0
+        data = self._read_rows(difficulty, "get", f"A{cursor + 2}:C") or []
+        rows = [(row[0], int(row[1]), row[2]) for row in data if row]
+        return rows, cursor + len(data)
+
+    def iter_pages(self, difficulty, page_size=5000):
+        first = 2  # Below the header
+        while True:
+            last = first + page_size - 1
+            data = self._read_rows(difficulty, "get", f"A{first}:C{last}")
+            data = data or []
+            rows = [(row[0], int(row[1]), row[2]) for row in data if row]
+            if rows:
+                yield rows
+            if len(data) < page_size:
+                return
+            first = last + 1
+
+    def replace_scores(self, difficulty, rows):
+        # Overwrite the top of the sheet, then drop whatever is left
+        # below, so the sheet is never seen completely empty. Resizing
+        # alone trims the old rows; clearing them first would address
+        # rows past the end when nothing was dropped.
+        worksheet = self.worksheet(difficulty)
+        values = [list(row) for row in rows]
+        if values:
+            self._request(
+                WRITE, "sheets.update", worksheet.update,
+                values, f"A2:C{len(values) + 1}",
+            )
+        self._request(
+            WRITE, "sheets.resize", worksheet.resize, rows=len(values) + 1
+        )
+
+    def _stats_worksheet(self, create=False):
+        """The Question Stats worksheet, or None if it is not there yet."""
+        try:
+            return self.connection.worksheet(STATS_WORKSHEET)
+        except KeyError:
+            if not create:
+                return None
+            return self.connection.add_worksheet(STATS_WORKSHEET, STATS_HEADER)
+
+    def _read_stats(self, worksheet):
+        data = self._request(
+            READ,
+            "sheets.get_all_values",
+            worksheet.get_all_values,
+            key=(STATS_WORKSHEET, "get_all_values"),
+        )
+        return [stats_from_strings(row) for row in data[1:] if row]
+
+    def add_question_stats(self, rows):
+        # Appended as new rows, never read back and rewritten, so
+        # processes flushing at the same moment can't lose each other's
+        # counts; question_stats() adds the rows up
+        if not rows:
+            return
+        worksheet = self._stats_worksheet(create=True)
+        self._request(
+            WRITE,
+            "sheets.append_rows",
+            worksheet.append_rows,
+            [stats_to_strings(row) for row in rows],
+        )
+
+    def question_stats(self):
+        worksheet = self._stats_worksheet()
+        if worksheet is None:
+            return []
+        return merged_stats([], self._read_stats(worksheet))
+
+    def compact_question_stats(self):
+        # Counts appended while this runs are lost, as with
+        # replace_scores()
+        worksheet = self._stats_worksheet()
+        if worksheet is None:
+            return
+        with self._stats_lock:
+            rows = merged_stats([], self._read_stats(worksheet))
+            if rows:
+                self._request(
+                    WRITE, "sheets.update", worksheet.update,
+                    [stats_to_strings(row) for row in rows],
+                    f"A2:H{len(rows) + 1}",
+                )
+            self._request(
+                WRITE, "sheets.resize", worksheet.resize, rows=len(rows) + 1
+            )
+
+
+class SQLiteScoreStore(ScoreStore):
+    """
+    Scores kept in a local SQLite file.
+
+    The (difficulty, score DESC) index lets top-N queries read only the
+    rows they return, and nothing here needs network credentials.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS scores (
+            id INTEGER PRIMARY KEY,
+            difficulty TEXT NOT NULL,
+            name TEXT NOT NULL,
+            score INTEGER NOT NULL,
+            played_on TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS scores_rank
+            ON scores (difficulty, score DESC, id);
+        -- Windowed boards come from LeaderboardCache's day partitions,
+        -- so no date index is kept up to date on every write
+        DROP INDEX IF EXISTS scores_day;
+        CREATE INDEX IF NOT EXISTS scores_player
+            ON scores (difficulty, name, score DESC);
+        CREATE TABLE IF NOT EXISTS question_stats (
+            difficulty TEXT NOT NULL,
+            question TEXT NOT NULL,
+            correct INTEGER NOT NULL,
+            wrong INTEGER NOT NULL,
+            timeouts INTEGER NOT NULL,
+            total_ms REAL NOT NULL,
+            max_ms REAL NOT NULL,
+            buckets TEXT NOT NULL,
+            PRIMARY KEY (difficulty, question)
+        );
+    """
+
+    def __init__(self, path="scores.db"):
+        self.path = path
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._conn is None:
+                import sqlite3  # Not loaded at all with the Sheets backend
+
+                self._conn = sqlite3.connect(
+                    self.path, check_same_thread=False
+                )
+                self._conn.executescript(self.SCHEMA)
+        return self
+
+    def append_score(self, difficulty, name, score, date):
+        self.start()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO scores (difficulty, name, score, played_on) "
+                "VALUES (?, ?, ?, ?)",
+                (difficulty, name, int(score), date),
+            )
+
+    def append_scores(self, difficulty, rows):
+        self.start()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO scores (difficulty, name, score, played_on) "
+                "VALUES (?, ?, ?, ?)",
+                [(difficulty, name, int(score), date)
+                 for name, score, date in rows],
+            )
+
+    def save_best_scores(self, difficulty, rows):
+        # Older files may hold several rows per player, so there is no
+        # unique key to upsert on; scores_player makes the lookup cheap.
+        self.start()
+        with self._lock, self._conn:
+            for name, score, date in best_rows(rows):
+                found = self._conn.execute(
+                    "SELECT id, score FROM scores "
+                    "WHERE difficulty = ? AND name = ? "
+                    "ORDER BY score DESC, id LIMIT 1",
+                    (difficulty, name),
+                ).fetchone()
+                if found is None:
+                    self._conn.execute(
+                        "INSERT INTO scores "
+                        "(difficulty, name, score, played_on) "
+                        "VALUES (?, ?, ?, ?)",
+                        (difficulty, name, score, date),
+                    )
+                elif score > found[1]:
+                    self._conn.execute(
+                        "UPDATE scores SET score = ?, played_on = ? "
+                        "WHERE id = ?",
+                        (score, date, found[0]),
+                    )
+
+    def top_scores(self, difficulty, limit=10):
+        self.start()
+        with self._lock:
+            return self._conn.execute(
+                "SELECT name, score, played_on FROM scores "
+                "WHERE difficulty = ? ORDER BY score DESC, id LIMIT ?",
+                (difficulty, limit),
+            ).fetchall()
+
+    def replace_scores(self, difficulty, rows):
+        self.start()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM scores WHERE difficulty = ?", (difficulty,)
+            )
+            self._conn.executemany(
+                "INSERT INTO scores (difficulty, name, score, played_on) "
+                "VALUES (?, ?, ?, ?)",
+                [(difficulty, name, int(score), date)
+                 for name, score, date in rows],
+            )
+
+    def add_question_stats(self, rows):
+        self.start()
+        with self._lock, self._conn:
+            # Take the write lock before reading, so another process
+            # can't add to the same totals in between
+            self._conn.execute("BEGIN IMMEDIATE")
+            stored = []
+            for row in rows:
+                found = self._conn.execute(
+                    "SELECT * FROM question_stats "
+                    "WHERE difficulty = ? AND question = ?",
+                    row[:2],
+                ).fetchone()
+                if found is not None:
+                    stored.append(stats_from_strings(found))
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO question_stats "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [stats_to_strings(row) for row in merged_stats(stored, rows)],
+            )
+
+    def question_stats(self):
+        self.start()
+        with self._lock:
+            found = self._conn.execute(
+                "SELECT * FROM question_stats"
+            ).fetchall()
+        return [stats_from_strings(row) for row in found]
+
+    def rows_since(self, difficulty, cursor=None):
+        # The cursor is the last row id seen
+        self.start()
+        with self._lock:
+            found = self._conn.execute(
+                "SELECT id, name, score, played_on FROM scores "
+                "WHERE id > ? AND difficulty = ? ORDER BY id",
+                (cursor or 0, difficulty),
+            ).fetchall()
+        if not found:
+            return [], cursor
+        return [row[1:] for row in found], found[-1][0]
+
+    def iter_pages(self, difficulty, page_size=5000):
+        self.start()
+        cursor = 0
+        while True:
+            with self._lock:
+                found = self._conn.execute(
+                    "SELECT id, name, score, played_on FROM scores "
+                    "WHERE id > ? AND difficulty = ? ORDER BY id LIMIT ?",
+                    (cursor, difficulty, page_size),
+                ).fetchall()
+            if not found:
+                return
+            yield [row[1:] for row in found]
+            cursor = found[-1][0]
+
+
+def merged_stats(rows, deltas):
+    """Add stats rows from `deltas` to the `rows` for the same question."""
+    totals = {(row[0], row[1]): list(row) for row in rows}
+    for delta in deltas:
+        total = totals.get((delta[0], delta[1]))
+        if total is None:
+            totals[(delta[0], delta[1])] = list(delta)
+            continue
+        for i in (2, 3, 4, 5):
+            total[i] += delta[i]
+        total[6] = max(total[6], delta[6])
+        total[7] = [
+            a + b
+            for a, b in itertools.zip_longest(total[7], delta[7], fillvalue=0)
+        ]
+    return [tuple(total) for total in totals.values()]
+
+
+def stats_from_strings(row):
+    """Parse a stats row read back as text (a sheet row or SQLite buckets)."""
+    difficulty, question, correct, wrong, timeouts, total, top, buckets = row
+    return (
+        difficulty,
+        question,
+        int(correct),
+        int(wrong),
+        int(timeouts),
+        float(total),
+        float(top),
+        [int(count) for count in str(buckets).split(",") if count],
+    )
+
+
+def stats_to_strings(row):
+    """The inverse of stats_from_strings(): buckets joined by commas."""
+    return list(row[:7]) + [",".join(str(count) for count in row[7])]
+
+
+def best_rows(rows):
+    """Reduce rows to each name's best, the first of equal scores winning."""
+    best = {}
+    for name, score, date in rows:
+        if name not in best or int(score) > best[name][1]:
+            best[name] = (name, int(score), date)
+    return list(best.values())
+
+
+def default_scheduler():
+    """
+    A RequestScheduler allowing QUIZ_SHEETS_RATE requests per minute
+    between all processes on this host, through a token file in the
+    spool directory.
+    """
+    rate = float(os.environ.get("QUIZ_SHEETS_RATE", 60))
+    if not rate:
+        return RequestScheduler(rate=0)
+    path = os.path.join(
+        os.environ.get("QUIZ_SPOOL_DIR", ".score_spool"), "sheets-quota"
+    )
+    return RequestScheduler(bucket=SharedTokenBucket(path, rate))
+
+
+def get_score_store():
+    """
+    Build the score store selected by QUIZ_SCORE_BACKEND.
+
+    "sheets" (the default) uses Google Sheets, "sqlite" a local file
+    named by QUIZ_SQLITE_PATH.
+    """
+    backend = os.environ.get("QUIZ_SCORE_BACKEND", "sheets").lower()
+    if backend == "sqlite":
+        path = os.environ.get("QUIZ_SQLITE_PATH", "scores.db")
+        return SQLiteScoreStore(path)
+    if backend == "sheets":
+        return SheetsScoreStore()
+    raise ValueError(f"Unknown QUIZ_SCORE_BACKEND: {backend}")
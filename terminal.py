@@ -0,0 +1,158 @@
+import functools
+import importlib
+import os
+import select
+import sys
+import threading
+import time
+
+try:
+    import termios
+except ImportError:  # Windows
+    termios = None
+
+import metrics
+
+# Cursor home, clear screen and clear scrollback, as `clear` would print
+CLEAR_SCREEN = "\x1b[H\x1b[2J\x1b[3J"
+
+
+class _ScreenBuffer:
+    """File-like object collecting rich's output in its Terminal."""
+
+    def __init__(self, terminal):
+        self.terminal = terminal
+
+    def write(self, text):
+        self.terminal.write(text)
+        return len(text)
+
+    def flush(self):
+        pass  # The Terminal decides when a screen is complete
+
+    def isatty(self):
+        return self.terminal.isatty()
+
+
+class Terminal:
+    """
+    Where a quiz session reads its input and writes its output.
+
+    Output, from rich or write(), is buffered and sent with one write
+    per flush(). Input reads flush first, so a whole screen normally
+    leaves as a single write. Clearing emits the ANSI sequence directly
+    instead of running `clear` in a shell.
+
+    The default implementation is the process's own stdin/stdout, as
+    used when run.py is spawned inside a pty. server.py provides one
+    per network connection instead.
+
+    Importing rich takes longer than everything else at startup, so the
+    rich Console is only created on first use; preload_console() starts
+    the import in the background while the plain title screen is shown.
+    """
+
+    def __init__(self, **console_options):
+        self._pending = []
+        self._lock = threading.Lock()
+        self._input = b""
+        self._console_options = console_options
+
+    @functools.cached_property
+    def console(self):
+        """The rich Console drawing on this terminal."""
+        from rich.console import Console
+
+        return Console(file=_ScreenBuffer(self), **self._console_options)
+
+    def preload_console(self):
+        """Import rich on a background thread ahead of the first use."""
+        threading.Thread(
+            target=importlib.import_module,
+            args=("rich.console",),
+            name="preload-rich",
+            daemon=True,
+        ).start()
+
+    def wants_color(self):
+        """
+        Whether the console will style its output, decided the way rich
+        does for the common cases but without importing it.
+        """
+        if "console" in self.__dict__:
+            return self.console.color_system is not None
+        options = self._console_options
+        if "color_system" in options and options["color_system"] is None:
+            return False
+        if os.environ.get("NO_COLOR"):
+            return False
+        if options.get("force_terminal") or os.environ.get("FORCE_COLOR"):
+            return True
+        term = os.environ.get("TERM", "").lower()
+        return self.isatty() and term not in ("dumb", "unknown")
+
+    def isatty(self):
+        return sys.stdout.isatty()
+
+    def write(self, text):
+        """Queue plain text with no rich markup processing."""
+        with self._lock:
+            self._pending.append(text)
+
+    def flush(self):
+        """Send everything queued since the last flush in one write."""
+        with self._lock:
+            text = "".join(self._pending)
+            self._pending = []
+        if text:
+            with metrics.timed("terminal.redraw"):
+                self._emit(text)
+
+    def _emit(self, text):
+        """Write a finished chunk of output to the real terminal."""
+        data = text.encode("utf-8")
+        fd = sys.stdout.fileno()
+        while data:
+            data = data[os.write(fd, data):]
+
+    def input(self, prompt="", deadline=None):
+        """
+        Read one line, raising EOFError once the player has gone.
+
+        With a time.monotonic() `deadline`, returns None if no complete
+        line has arrived by then.
+        """
+        if prompt:
+            self.write(prompt)
+        self.flush()
+        return self._read_line(deadline)
+
+    def _read_line(self, deadline):
+        if os.name == "nt":
+            return input()  # No select() on console handles: no deadline
+        fd = sys.stdin.fileno()
+        # Lines are split here rather than by sys.stdin so select() never
+        # waits while a line already sits in Python's read buffer.
+        while b"\n" not in self._input:
+            timeout = None
+            if deadline is not None:
+                timeout = max(0, deadline - time.monotonic())
+            ready, _, _ = select.select([fd], [], [], timeout)
+            if not ready:
+                return None
+            data = os.read(fd, 4096)
+            if not data:
+                raise EOFError
+            self._input += data
+        line, _, self._input = self._input.partition(b"\n")
+        return line.decode("utf-8", "replace").rstrip("\r")
+
+    def discard_input(self):
+        """Forget anything typed but not yet read, such as a half line."""
+        if termios is not None and sys.stdin.isatty():
+            self._input = b""
+            termios.tcflush(sys.stdin.fileno(), termios.TCIFLUSH)
+
+    def clear(self):
+        """Clears the terminal window prior to new content."""
+        self.write(CLEAR_SCREEN)
@@ -0,0 +1,16 @@
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# The app's modules, and the in-memory worksheets used by the benchmarks
+sys.path[:0] = [ROOT, os.path.join(ROOT, "benchmarks")]
+# Never touch real Google Sheets from a test by accident
+os.environ.setdefault("QUIZ_SCORE_BACKEND", "sqlite")
+os.environ.setdefault("QUIZ_SQLITE_PATH", ":memory:")
+# Spooled scores and checkpoints from games played in tests go here
+SCRATCH = tempfile.mkdtemp(prefix="quiz-tests-")
+os.environ.setdefault("QUIZ_SPOOL_DIR", os.path.join(SCRATCH, "spool"))
+os.environ.setdefault(
+    "QUIZ_CHECKPOINT_DIR", os.path.join(SCRATCH, "sessions")
+)
@@ -0,0 +1,82 @@
+import os
+import time
+
+import pytest
+
+import run
+from checkpoints import CheckpointStore
+from harness import ScriptedTerminal
+
+TOKEN = "session-0123"
+
+
+@pytest.fixture
+def checkpoints(tmp_path, monkeypatch):
+    store = CheckpointStore(str(tmp_path), ttl=60)
+    monkeypatch.setattr(run, "CHECKPOINTS", store)
+    return store
+
+
+def age(path, seconds):
+    then = time.time() - seconds
+    os.utime(path, (then, then))
+
+
+def test_save_and_load(checkpoints):
+    checkpoints.save(TOKEN, {"chosen": [1]})
+    assert checkpoints.load(TOKEN) == {"chosen": [1]}
+    checkpoints.save("../escape", {"chosen": []})  # Not a valid token
+    assert os.listdir(checkpoints.directory) == [f"{TOKEN}.json"]
+    checkpoints.delete(TOKEN)
+    assert checkpoints.load(TOKEN) is None
+
+
+def test_expired_checkpoint_is_not_loaded(checkpoints):
+    checkpoints.save(TOKEN, {"chosen": [1]})
+    age(checkpoints._path(TOKEN), 120)
+    assert checkpoints.load(TOKEN) is None
+    assert os.listdir(checkpoints.directory) == []
+
+
+def test_sweep_removes_only_expired_files(checkpoints):
+    checkpoints.save(TOKEN, {"chosen": [1]})
+    checkpoints.save("abandoned-1", {"chosen": []})
+    stale = [checkpoints._path("abandoned-1")]
+    for name in ("killed-01.json.tmp", "4242.handoff"):
+        stale.append(os.path.join(checkpoints.directory, name))
+        open(stale[-1], "w").close()
+    for path in stale:
+        age(path, 120)
+    assert checkpoints.sweep() == 3
+    assert os.listdir(checkpoints.directory) == [f"{TOKEN}.json"]
+
+
+def test_game_resumes_from_its_checkpoint(checkpoints):
+    with pytest.raises(EOFError):  # Connection lost after two answers
+        run.play(ScriptedTerminal(["", "Ann", "1", "1", "2"]), TOKEN)
+    state = checkpoints.load(TOKEN)
+    assert state["chosen"] == [0, 1]
+
+    quiz = run.resume_game(ScriptedTerminal([""]), TOKEN)
+    assert quiz.name == "Ann" and quiz.difficulty == "Easy"
+    assert quiz.answers.question_ids.tolist() == state["question_ids"]
+    assert quiz.answers.chosen.tolist() == [0, 1]
+
+    # The other eight answers, the summary pages, then exit
+    run.play(ScriptedTerminal([""] + ["1"] * 8 + ["", "", "3"]), TOKEN)
+    assert checkpoints.load(TOKEN) is None  # Finished
+
+
+def test_checkpoint_for_other_questions_is_not_resumed(
+    checkpoints, monkeypatch
+):
+    with pytest.raises(EOFError):
+        run.play(ScriptedTerminal(["", "Ann", "1", "1"]), TOKEN)
+    state = checkpoints.load(TOKEN)
+    state["questions"] = "/elsewhere/questions.json"
+
+    def load(path):
+        raise AssertionError(f"loaded {path}")
+
+    monkeypatch.setattr(run, "load_question_bank", load)
+    assert not run.Quiz(ScriptedTerminal([]), TOKEN).resume(state)
@@ -0,0 +1,110 @@
+import json
+import os
+import threading
+
+import pytest
+
+from headless import (
+    HARD_TIME_LIMIT,
+    HeadlessGame,
+    HeadlessProtocol,
+    ProtocolError,
+    serve,
+)
+
+
+@pytest.mark.parametrize("choice", [True, False, 0, 99, "1", 1.0])
+def test_answer_rejects_anything_but_an_option_number(choice):
+    game = HeadlessGame("Ann", "Easy")
+    with pytest.raises(ProtocolError):
+        game.answer(choice)
+    game.answer(1)
+    assert len(game.answers.chosen) == 1
+
+
+def call(protocol, **request):
+    return json.loads(protocol.handle_line(json.dumps(request).encode()))
+
+
+def test_a_game_through_the_protocol():
+    protocol = HeadlessProtocol()
+    started = call(protocol, op="start", name="Ann", difficulty="easy", id=7)
+    assert started["ok"] and started["id"] == 7
+    session = started["session"]
+    for index in range(1, started["questions"] + 1):
+        question = call(protocol, op="next", session=session)
+        assert question["index"] == index
+        assert question["time_limit"] is None
+        answer = call(protocol, op="answer", session=session, choice=1)
+        assert answer["done"] == (index == started["questions"])
+    assert call(protocol, op="next", session=session) == {
+        "ok": True, "done": True
+    }
+    results = call(protocol, op="results", session=session)
+    assert results["score"] == answer["score"]
+    assert results["rank"] >= 1 and results["players"] >= 1
+    assert [a["chosen"] for a in results["answers"]] == [1] * 10
+    # "results" forgets the session
+    assert call(protocol, op="results", session=session) == {
+        "ok": False, "error": "unknown session"
+    }
+
+
+def test_late_hard_answer_is_a_timeout():
+    protocol = HeadlessProtocol()
+    session = call(protocol, op="start", name="Ann", difficulty="Hard")[
+        "session"
+    ]
+    assert call(protocol, op="next", session=session)["time_limit"] == 5
+    protocol.sessions[session].asked_at -= HARD_TIME_LIMIT + 1
+    answer = call(protocol, op="answer", session=session, choice=1)
+    assert answer["result"] == "Timeout" and answer["score"] == 0
+
+
+def test_bad_requests_are_reported():
+    protocol = HeadlessProtocol()
+    for request, error in (
+        (b"{not json", "bad JSON"),
+        (b"[1, 2]", "bad JSON"),
+        (b'{"op": "fly"}', "unknown op 'fly'"),
+        (b'{"op": "next", "session": "nope"}', "unknown session"),
+        (b'{"op": "start", "name": "Ann", "difficulty": "Mid"}',
+         "difficulty must be"),
+    ):
+        response = json.loads(protocol.handle_line(request))
+        assert response["ok"] is False
+        assert response["error"].startswith(error)
+
+
+def test_serve_joins_lines_split_across_reads():
+    # Long enough that requests straddle serve()'s 64 KiB reads
+    requests = b"".join(
+        json.dumps({"op": "fly", "id": i, "pad": "x" * 1000}).encode()
+        + b"\n"
+        for i in range(200)
+    )
+    infile, writer = os.pipe()
+    reader, outfile = os.pipe()
+    output = []
+
+    def feed():
+        view = memoryview(requests)
+        while view:
+            view = view[os.write(writer, view):]
+        os.close(writer)
+
+    def drain():
+        while data := os.read(reader, 65536):
+            output.append(data)
+
+    threads = [threading.Thread(target=feed), threading.Thread(target=drain)]
+    for thread in threads:
+        thread.start()
+    serve(HeadlessProtocol(), infile, outfile)
+    os.close(outfile)
+    for thread in threads:
+        thread.join()
+    os.close(infile)
+    os.close(reader)
+    replies = b"".join(output).splitlines()
+    assert [json.loads(reply)["id"] for reply in replies] == list(range(200))
@@ -0,0 +1,67 @@
+import datetime
+
+from leaderboard import LeaderboardCache
+
+
+class MemoryStore:
+    """Just enough of a ScoreStore for LeaderboardCache."""
+
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+
+    def rows_since(self, difficulty, cursor=None):
+        cursor = cursor or 0
+        return self.rows[cursor:], len(self.rows)
+
+
+def test_record_only_keeps_new_bests_pending():
+    store = MemoryStore([("Ann", 8, "2025-01-01")])
+    cache = LeaderboardCache(store, ttl=0, rebuild_every=0)
+    cache.top("Easy")
+    for _ in range(5):
+        cache.record("Easy", "Ann", 4, "2025-01-02")
+    cache.top("Easy")  # Rebuilt
+    assert not cache._board("Easy").pending
+    assert cache.best("Easy", "Ann") == 8
+
+
+def test_window_keeps_every_best_set_in_it():
+    rows = [(f"P{i}", i, "2025-01-02") for i in range(12)]
+    cache = LeaderboardCache(MemoryStore(rows), size=10, ttl=3600)
+    today = datetime.date(2025, 1, 2)
+    rows, _ = cache.top("Easy", window="day", today=today)
+    assert len(rows) == 10
+    # Two players improve on a later day: the rows ranked 11th and 12th
+    # on the earlier day must move up into its board
+    cache.record("Easy", "P11", 20, "2025-01-03")
+    cache.record("Easy", "P10", 20, "2025-01-03")
+    rows, _ = cache.top("Easy", window="day", today=today)
+    names = [row[0] for row in rows]
+    assert names == [f"P{i}" for i in range(9, -1, -1)]
+
+
+def test_standing_counts_the_players_best():
+    rows = [("Ann", 8, "2025-01-01"), ("Bob", 6, "2025-01-01")]
+    cache = LeaderboardCache(MemoryStore(rows), ttl=3600)
+    assert cache.standing("Easy", "Bob", 3) is None  # Not built yet
+    assert cache.standing("Easy", "Bob", 3, fetch=True) == (6, 2, 2)
+    assert cache.standing("Easy", "Cat", 7) == (7, 2, 2)  # Not recorded
+
+
+def test_standing_never_reads_the_store_unless_asked():
+    class OfflineStore:
+        def rows_since(self, difficulty, cursor=None):
+            raise AssertionError("read the store")
+
+    cache = LeaderboardCache(OfflineStore())
+    cache.record("Easy", "Ann", 5, "2025-01-01")
+    assert cache.standing("Easy", "Ann", 5) is None
+
+
+def test_top_returns_the_version_of_its_rows():
+    cache = LeaderboardCache(MemoryStore([("Ann", 8, "2025-01-01")]), ttl=3600)
+    rows, version = cache.top("Easy")
+    assert cache.top("Easy") == (rows, version)
+    cache.record("Easy", "Bob", 9, "2025-01-02")
+    rows, newer = cache.top("Easy")
+    assert rows[0][0] == "Bob" and newer != version
@@ -0,0 +1,83 @@
+import multiprocessing
+import os
+import subprocess
+import sys
+
+from harness import LocalSheets, LocalWorksheet
+from question_stats import QuestionStats
+from questions import CORRECT, TIMEOUT, WRONG
+from sheets import RequestScheduler
+from storage import SheetsScoreStore
+
+
+def sheets_store(worksheets):
+    return SheetsScoreStore(
+        LocalSheets(worksheets), scheduler=RequestScheduler(rate=0)
+    )
+
+
+def _answer_and_die(spool_dir):
+    stats = QuestionStats(None, interval=3600, spool_dir=spool_dir)
+    stats.record("Easy", "2 + 2?", CORRECT, 1.5)
+    stats.record("Easy", "2 + 2?", WRONG, 0.5)
+    os._exit(0)  # Killed: no flush, no atexit
+
+
+def test_counts_of_a_killed_process_are_recovered(tmp_path):
+    worksheets = {"Easy Scores": LocalWorksheet()}
+    context = multiprocessing.get_context("fork")
+    child = context.Process(target=_answer_and_die, args=(str(tmp_path),))
+    child.start()
+    child.join()
+
+    stats = QuestionStats(sheets_store(worksheets), spool_dir=str(tmp_path))
+    stats.start()
+    stats.record("Easy", "2 + 2?", TIMEOUT, 5)
+    stats.flush()
+    assert os.listdir(tmp_path) == [os.path.basename(stats.spool_path)]
+    assert os.path.getsize(stats.spool_path) == 0
+
+    counter = QuestionStats(sheets_store(worksheets)).totals()[
+        ("Easy", "2 + 2?")
+    ]
+    assert (counter.correct, counter.wrong, counter.timeouts) == (1, 1, 1)
+    assert counter.times.total == 7000
+
+
+def test_sheets_stats_from_several_processes_add_up():
+    worksheets = {"Easy Scores": LocalWorksheet()}
+    first, second = sheets_store(worksheets), sheets_store(worksheets)
+    for store, result in ((first, CORRECT), (second, WRONG), (first, WRONG)):
+        stats = QuestionStats(store)
+        stats.record("Easy", "2 + 2?", result, 1)
+        stats.flush()
+    assert len(worksheets["Question Stats"].rows) == 4
+
+    first.compact_question_stats()
+    assert len(worksheets["Question Stats"].rows) == 2
+    (row,) = second.question_stats()
+    assert row[2:5] == (1, 2, 0)
+
+
+def test_exit_with_the_store_down_keeps_the_counts_quietly(tmp_path):
+    script = f"""
+from question_stats import QuestionStats
+
+class DownStore:
+    def add_question_stats(self, rows):
+        raise ConnectionError("offline")
+
+stats = QuestionStats(DownStore(), spool_dir={str(tmp_path)!r})
+stats.record("Easy", "2 + 2?", 0, 1)
+"""
+    finished = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=os.path.dirname(os.path.dirname(__file__)),
+        capture_output=True,
+        text=True,
+        timeout=30,
+    )
+    assert finished.returncode == 0
+    assert finished.stderr == ""
+    (spool,) = os.listdir(tmp_path)
+    assert os.path.getsize(os.path.join(tmp_path, spool)) > 0
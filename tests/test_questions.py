@@ -0,0 +1,29 @@
+import json
+import pickle
+
+import questions
+from questions import load_question_bank
+
+QUESTION = {
+    "category": "landmarks",
+    "difficulty": "easy",
+    "question": "Where is the Eiffel Tower?",
+    "options": ["Paris", "Rome"],
+    "answer": "Paris",
+}
+
+
+def test_unloadable_cache_is_rebuilt(tmp_path):
+    path = tmp_path / "questions.json"
+    path.write_text(json.dumps([QUESTION]), encoding="utf-8")
+    # As if pickled by code with a class this version no longer has
+    (tmp_path / "questions.json.compiled").write_bytes(
+        b"\x80\x04\x8c\x0bgone_module\x94\x8c\x04Bank\x94\x93\x94."
+    )
+    load_question_bank.cache_clear()
+    bank = load_question_bank(str(path))
+    assert bank.texts == ("Where is the Eiffel Tower?",)
+
+    with open(tmp_path / "questions.json.compiled", "rb") as cache:
+        stamp, _ = pickle.load(cache)
+    assert stamp[0] == questions.BANK_FORMAT
@@ -0,0 +1,40 @@
+import json
+import multiprocessing
+import os
+import subprocess
+
+from score_queue import ScoreQueue
+
+
+class MemoryStore:
+    def __init__(self):
+        self.saved = []
+
+    def save_best_scores(self, difficulty, rows):
+        self.saved += [(difficulty, *row) for row in rows]
+
+
+def _claim_and_die(spool_dir):
+    ScoreQueue(None, spool_dir=spool_dir)._recover()
+    os._exit(0)  # Killed before the rows reached its own spool
+
+
+def test_files_claimed_by_a_killed_process_are_recovered(tmp_path):
+    process = subprocess.Popen(["true"])
+    process.wait()
+    path = os.path.join(tmp_path, f"{process.pid}-0123abcd.jsonl")
+    with open(path, "w", encoding="utf-8") as spool:
+        spool.write(json.dumps(["Easy", "Ann", 5, "2025-01-01"]) + "\n")
+    child = multiprocessing.get_context("fork").Process(
+        target=_claim_and_die, args=(str(tmp_path),)
+    )
+    child.start()
+    child.join()
+
+    store = MemoryStore()
+    queue = ScoreQueue(store, spool_dir=str(tmp_path), flush_interval=0)
+    queue.start()
+    assert queue.flush(timeout=5)
+    queue.close()
+    assert store.saved == [("Easy", "Ann", 5, "2025-01-01")]
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,39 @@
+import asyncio
+
+import pytest
+
+from server import SessionTerminal
+
+
+class Writer:
+    def __init__(self):
+        self.data = b""
+
+    def is_closing(self):
+        return False
+
+    def write(self, data):
+        self.data += data
+
+
+@pytest.fixture
+def terminal():
+    loop = asyncio.new_event_loop()
+    yield SessionTerminal(loop, Writer())
+    loop.close()
+
+
+def test_discard_input_drops_lines_typed_ahead(terminal):
+    terminal.feed(b"1\r2\r3")
+    terminal.discard_input()
+    terminal.loop.run_until_complete(asyncio.sleep(0))
+    terminal.feed(b"4\r")
+    assert terminal._read_line(None) == "4"
+
+
+def test_discard_input_keeps_the_hang_up(terminal):
+    terminal.feed(b"1\r")
+    terminal.hang_up()
+    terminal.discard_input()
+    with pytest.raises(EOFError):
+        terminal._read_line(None)
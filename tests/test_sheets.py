@@ -0,0 +1,70 @@
+import multiprocessing
+import os
+import traceback
+
+import pytest
+
+import sheets
+from sheets import SharedTokenBucket, SheetsConnection
+
+
+class FlakyConnection(SheetsConnection):
+    """Fails to connect `failures` times, then succeeds."""
+
+    def __init__(self, failures):
+        super().__init__()
+        self.failures = failures
+        self.attempts = 0
+
+    def _connect(self, failures):
+        self.attempts += 1
+        if self.attempts <= self.failures:
+            failures.append(ConnectionError("offline"))
+        else:
+            self._worksheets["Easy Scores"] = "worksheet"
+
+
+def test_failed_connection_is_retried_after_backoff(monkeypatch):
+    monkeypatch.setattr(sheets, "RECONNECT_BACKOFF", (0.0, 0.0))
+    connection = FlakyConnection(failures=2)
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            connection.worksheet("Easy Scores")
+    assert connection.worksheet("Easy Scores") == "worksheet"
+    assert connection.worksheet("Easy Scores") == "worksheet"
+    assert connection.attempts == 3
+
+
+def test_no_retry_while_backing_off():
+    connection = FlakyConnection(failures=1)
+    errors = []
+    for _ in range(50):
+        with pytest.raises(ConnectionError) as raised:
+            connection.worksheet("Easy Scores")
+        errors.append(raised.value)
+    assert connection.attempts == 1
+    # A fresh error each time, so tracebacks don't pile up on one
+    assert len(set(map(id, errors[1:]))) == 49
+    assert len(traceback.extract_tb(errors[-1].__traceback__)) < 5
+    assert errors[-1].__cause__ is errors[0]
+
+
+def _take_all(path, results):
+    bucket = SharedTokenBucket(path, rate=0.001, burst=5)
+    results.put(sum(bucket.take() == 0 for _ in range(5)))
+
+
+def test_token_budget_is_shared_between_processes(tmp_path):
+    path = os.path.join(tmp_path, "sheets-quota")
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+    processes = [
+        context.Process(target=_take_all, args=(path, results))
+        for _ in range(3)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    assert sum(results.get() for _ in processes) == 5
+    assert SharedTokenBucket(path, rate=0.001, burst=5).take() > 0
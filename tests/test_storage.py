@@ -0,0 +1,127 @@
+import threading
+
+from harness import LocalSheets, LocalWorksheet
+from sheets import RequestScheduler
+from storage import SheetsScoreStore, SQLiteScoreStore
+
+
+def shared_stores(count, rows=()):
+    """Stores in separate "processes" writing to one pair of worksheets."""
+    worksheets = {
+        "Easy Scores": LocalWorksheet(rows),
+        "Hard Scores": LocalWorksheet(),
+    }
+    return [
+        SheetsScoreStore(
+            LocalSheets(worksheets), scheduler=RequestScheduler(rate=0)
+        )
+        for _ in range(count)
+    ], worksheets["Easy Scores"]
+
+
+def test_save_best_scores_updates_in_place():
+    (store,), sheet = shared_stores(1)
+    store.save_best_scores("Easy", [("Ann", 5, "2025-01-01")])
+    store.save_best_scores("Easy", [("Bob", 3, "2025-01-01")])
+    store.save_best_scores("Easy", [("Ann", 7, "2025-01-02")])
+    store.save_best_scores("Easy", [("Ann", 6, "2025-01-03")])
+    assert sheet.rows[1:] == [
+        ["Ann", 7, "2025-01-02"],
+        ["Bob", 3, "2025-01-01"],
+    ]
+
+
+def test_save_best_scores_sees_improvements_by_other_processes():
+    (first, second), sheet = shared_stores(2)
+    first.save_best_scores("Easy", [("Ann", 5, "2025-01-01")])
+    first.save_best_scores("Easy", [("Bob", 3, "2025-01-01")])  # Indexes Ann
+    second.save_best_scores("Easy", [("Ann", 8, "2025-01-02")])
+    first.save_best_scores("Easy", [("Ann", 6, "2025-01-03")])
+    assert sheet.rows[1:] == [
+        ["Ann", 8, "2025-01-02"],
+        ["Bob", 3, "2025-01-01"],
+    ]
+
+
+def test_save_best_scores_after_compaction_moves_rows():
+    (first, second), sheet = shared_stores(2)
+    first.save_best_scores(
+        "Easy", [("Ann", 5, "2025-01-01"), ("Bob", 3, "2025-01-01")]
+    )
+    first.save_best_scores("Easy", [("Cat", 1, "2025-01-01")])
+    second.replace_scores("Easy", [("Bob", 3, "2025-01-01")])
+    first.save_best_scores("Easy", [("Bob", 4, "2025-01-02")])
+    assert sheet.rows[1:] == [["Bob", 4, "2025-01-02"]]
+
+
+def test_reads_stop_at_the_end_of_the_sheet():
+    rows = [("Ann", 5, "2025-01-01"), ("Bob", 3, "2025-01-01")]
+    (store,), sheet = shared_stores(1, rows)
+    found, cursor = store.rows_since("Easy")
+    assert found == rows
+    assert store.rows_since("Easy", cursor) == ([], cursor)
+    assert list(store.iter_pages("Easy", page_size=2)) == [rows]
+    store.replace_scores("Easy", rows)  # Nothing below to drop
+    store.save_best_scores("Easy", [("Cat", 1, "2025-01-02")])
+    store.save_best_scores("Easy", [("Dan", 2, "2025-01-02")])
+    assert sheet.rows[1:] == [list(row) for row in rows] + [
+        ["Cat", 1, "2025-01-02"],
+        ["Dan", 2, "2025-01-02"],
+    ]
+
+
+def test_save_best_scores_after_compaction_shrinks_the_sheet():
+    (first, second), sheet = shared_stores(2)
+    first.save_best_scores(
+        "Easy", [("Ann", 5, "2025-01-01"), ("Bob", 3, "2025-01-01")]
+    )
+    first.save_best_scores("Easy", [("Cat", 1, "2025-01-01")])
+    second.replace_scores("Easy", [("Cat", 1, "2025-01-01")])
+    first.save_best_scores("Easy", [("Bob", 4, "2025-01-02")])
+    assert sheet.rows[1:] == [
+        ["Cat", 1, "2025-01-01"],
+        ["Bob", 4, "2025-01-02"],
+    ]
+
+
+def test_sqlite_save_best_scores_inserts_improves_and_ignores():
+    store = SQLiteScoreStore(":memory:")
+    store.save_best_scores("Easy", [("Ann", 5, "2025-01-01")])
+    store.save_best_scores("Easy", [("Ann", 7, "2025-01-02")])
+    store.save_best_scores("Easy", [("Ann", 6, "2025-01-03")])
+    store.save_best_scores("Hard", [("Ann", 1, "2025-01-03")])
+    assert store.top_scores("Easy") == [("Ann", 7, "2025-01-02")]
+    assert store.top_scores("Hard") == [("Ann", 1, "2025-01-03")]
+
+
+def test_sqlite_rows_since_and_pages():
+    store = SQLiteScoreStore(":memory:")
+    rows = [(f"P{i}", i, "2025-01-01") for i in range(5)]
+    store.append_scores("Easy", rows[:3])
+    store.append_scores("Hard", [("Zed", 1, "2025-01-01")])
+    found, cursor = store.rows_since("Easy")
+    assert found == rows[:3]
+    assert store.rows_since("Easy", cursor) == ([], cursor)
+    store.append_scores("Easy", rows[3:])
+    assert store.rows_since("Easy", cursor)[0] == rows[3:]
+    assert list(store.iter_pages("Easy", page_size=2)) == [
+        rows[0:2], rows[2:4], rows[4:]
+    ]
+
+
+def test_sqlite_question_stats_from_several_processes_add_up(tmp_path):
+    path = str(tmp_path / "scores.db")
+    stores = [SQLiteScoreStore(path) for _ in range(4)]
+    row = ("Easy", "2 + 2?", 1, 0, 0, 1000.0, 1000.0, [0, 1])
+
+    def flush(store):
+        for _ in range(25):
+            store.add_question_stats([row])
+
+    threads = [threading.Thread(target=flush, args=(s,)) for s in stores]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    (total,) = SQLiteScoreStore(path).question_stats()
+    assert total == ("Easy", "2 + 2?", 100, 0, 0, 1e5, 1000.0, [0, 100])